@@ -0,0 +1,158 @@
+"""
+Arrow-native extraction: read source rows straight into Arrow record batches.
+
+Column types come from the source table's declared types (via SQLAlchemy
+reflection) instead of pandas dtype inference, so integer columns with NULLs
+stay integers, decimals stay exact and strings never become Python object
+columns.
+"""
+
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pyarrow as pa
+from sqlalchemy import inspect
+from sqlalchemy import types as sqltypes
+
+logger = logging.getLogger(__name__)
+
+# Errors pyarrow raises when values don't fit a requested type
+_CONVERSION_ERRORS = (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError, TypeError, ValueError)
+
+
+def arrow_type_for(sql_type: sqltypes.TypeEngine) -> Optional[pa.DataType]:
+    """Map a SQLAlchemy column type to an Arrow type, or None to infer it from the data."""
+    if isinstance(sql_type, sqltypes.Boolean):
+        return pa.bool_()
+    if isinstance(sql_type, sqltypes.SmallInteger):
+        return pa.int16()
+    if isinstance(sql_type, sqltypes.Integer):
+        # Generic INTEGER is 64-bit in some sources (SQLite), so don't narrow it
+        return pa.int64()
+    if isinstance(sql_type, sqltypes.Float):
+        return pa.float64()
+    if isinstance(sql_type, sqltypes.Numeric):
+        if sql_type.precision and sql_type.precision <= 38:
+            return pa.decimal128(sql_type.precision, sql_type.scale or 0)
+        return pa.float64()
+    if isinstance(sql_type, sqltypes.DateTime):
+        return pa.timestamp('us', tz='UTC' if sql_type.timezone else None)
+    if isinstance(sql_type, sqltypes.Date):
+        return pa.date32()
+    if isinstance(sql_type, sqltypes.Time):
+        return pa.time64('us')
+    if isinstance(sql_type, (sqltypes.LargeBinary, sqltypes.BINARY, sqltypes.VARBINARY)):
+        return pa.binary()
+    if isinstance(sql_type, sqltypes.String):
+        return pa.string()
+    return None
+
+
+def duckdb_type(arrow_type: pa.DataType) -> Optional[str]:
+    """The DuckDB type for an Arrow type from arrow_type_for, or None if there isn't one."""
+    if pa.types.is_decimal(arrow_type):
+        return f"DECIMAL({arrow_type.precision},{arrow_type.scale})"
+    if pa.types.is_timestamp(arrow_type):
+        return 'TIMESTAMPTZ' if arrow_type.tz else 'TIMESTAMP'
+    names = {
+        pa.bool_(): 'BOOLEAN', pa.int16(): 'SMALLINT', pa.int64(): 'BIGINT', pa.float64(): 'DOUBLE',
+        pa.date32(): 'DATE', pa.time64('us'): 'TIME', pa.binary(): 'BLOB', pa.string(): 'VARCHAR',
+    }
+    return names.get(arrow_type)
+
+
+def source_schema(engine, schema: Optional[str], table: str) -> Dict[str, pa.DataType]:
+    """Declared column types of a source table as Arrow types, keyed by column name.
+
+    Columns whose type has no Arrow mapping are left out (and inferred from
+    the data); an empty dict means the table could not be reflected.
+    """
+    try:
+        columns = inspect(engine).get_columns(table, schema=schema)
+    except Exception as e:
+        logger.debug(f"Could not reflect {schema}.{table}; inferring column types from data: {e}")
+        return {}
+
+    types = {}
+    for column in columns:
+        arrow_type = arrow_type_for(column['type'])
+        if arrow_type is not None:
+            types[column['name']] = arrow_type
+    return types
+
+
+def to_arrow_array(values: Iterable, arrow_type: pa.DataType, via_cast: bool = False) -> pa.Array:
+    """Build an Arrow array of the given type from driver values.
+
+    Drivers don't always hand back the Python type matching the column
+    (SQLite returns ISO strings for timestamps and floats for decimals), so
+    values that don't convert directly are converted via Arrow's own cast.
+    ``via_cast`` goes straight to the cast when that is already known.
+    """
+    if not via_cast:
+        try:
+            return pa.array(values, type=arrow_type)
+        except _CONVERSION_ERRORS:
+            pass
+    return pa.array(values).cast(arrow_type)
+
+
+def empty_schema(names: List[str], declared: Optional[Dict[str, pa.DataType]] = None) -> pa.Schema:
+    """Schema for a result with no rows: declared types, strings for the rest."""
+    declared = declared or {}
+    return pa.schema([(name, declared.get(name, pa.string())) for name in names])
+
+
+def iter_record_batches(result, batch_size: int,
+                        declared: Optional[Dict[str, pa.DataType]] = None) -> Iterator[pa.RecordBatch]:
+    """Fetch a SQLAlchemy result ``batch_size`` rows at a time as Arrow record batches.
+
+    The schema is fixed by the first batch: each column gets its declared
+    type if the values fit it, otherwise the type Arrow infers (string for a
+    column that is entirely NULL). Later batches are converted to that schema.
+    """
+    names = list(result.keys())
+    declared = declared or {}
+    schema = None
+    # Per column: whether the driver's values need Arrow's cast to reach the schema type
+    via_cast: List[bool] = []
+
+    while True:
+        rows = result.fetchmany(batch_size)
+        if not rows:
+            break
+        columns = list(zip(*rows))
+
+        if schema is None:
+            arrays = []
+            for name, values in zip(names, columns):
+                array, cast = _first_array(name, values, declared.get(name))
+                arrays.append(array)
+                via_cast.append(cast)
+            schema = pa.schema([(name, array.type) for name, array in zip(names, arrays)])
+        else:
+            arrays = [to_arrow_array(values, field.type, cast)
+                      for values, field, cast in zip(columns, schema, via_cast)]
+
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _first_array(name: str, values: Iterable, declared: Optional[pa.DataType]) -> Tuple[pa.Array, bool]:
+    """Convert a column of the first batch, settling its type for the whole extract.
+
+    Returns the array and whether later batches should convert via a cast.
+    """
+    if declared is not None:
+        try:
+            return pa.array(values, type=declared), False
+        except _CONVERSION_ERRORS:
+            pass
+        try:
+            return pa.array(values).cast(declared), True
+        except _CONVERSION_ERRORS as e:
+            logger.warning(f"Column {name} does not fit its declared type {declared} ({e}); inferring from data")
+
+    array = pa.array(values)
+    if pa.types.is_null(array.type):
+        return array.cast(pa.string()), True
+    return array, False
@@ -0,0 +1,7 @@
+"""
+Benchmarks for Parquet Pipelines, runnable as modules, e.g.
+
+    python -m parquet_pipelines.benchmarks.pipeline --scale 1 5 --output results.json
+    python -m parquet_pipelines.benchmarks.extract_backends
+    python -m parquet_pipelines.benchmarks.startup
+"""
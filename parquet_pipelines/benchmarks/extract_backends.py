@@ -0,0 +1,120 @@
+"""
+Benchmark the pandas, Arrow and native DuckDB extraction backends on the synthetic retail schema.
+
+    python -m parquet_pipelines.benchmarks.extract_backends --customers 50000 --output results.json
+
+Each backend extracts every retail table from the same SQLite file into a
+fresh DuckLake. Each runs in its own process so peak memory is measured in
+isolation. Reports rows/sec, peak RSS and how many bronze columns ended up as
+VARCHAR (pandas turns SQLite timestamps and decimals into strings).
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+from parquet_pipelines.benchmarks.retail import RETAIL_DDL, create_retail_sqlite
+
+
+def _peak_rss_bytes() -> int:
+    """Peak resident set size of this process so far (0 if the platform can't tell)."""
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def run_backend(backend: str, database: str, workdir: str, batch_size: int) -> Dict:
+    """Extract every retail table with one backend and return its timings (runs in a child process)."""
+    logging.disable(logging.INFO)
+    from parquet_pipelines.cli import ParquetPipelines
+
+    baseline_rss = _peak_rss_bytes()
+    pp = ParquetPipelines(base_dir=Path(workdir) / backend)
+    source_config = {
+        'connection': {'type': 'sqlite', 'database': database},
+        'backend': backend,
+        'batch_size': batch_size,
+    }
+
+    tables = {}
+    start = time.perf_counter()
+    try:
+        for table in RETAIL_DDL:
+            stats = pp.extract_table(source_config, {'name': table, 'schema': 'main'}, force=True)
+            tables[table] = {'rows': stats['rows'], 'seconds': stats['seconds']}
+        elapsed = time.perf_counter() - start
+
+        varchar_columns = pp._get_duck_connection().execute("""
+            SELECT COUNT(*) FROM duckdb_columns()
+            WHERE database_name = ? AND schema_name = 'bronze' AND data_type = 'VARCHAR'
+        """, [pp.ducklake_name]).fetchone()[0]
+    finally:
+        pp.cleanup()
+
+    rows = sum(t['rows'] for t in tables.values())
+    return {
+        'backend': backend,
+        'rows': rows,
+        'seconds': round(elapsed, 3),
+        'rows_per_sec': round(rows / elapsed) if elapsed else None,
+        'baseline_rss_bytes': baseline_rss,
+        'peak_rss_bytes': _peak_rss_bytes(),
+        'varchar_columns': varchar_columns,
+        'tables': tables,
+    }
+
+
+def run_benchmark(customers: int, batch_size: int, backends: List[str], workdir: Path) -> Dict:
+    """Build the retail database under ``workdir`` and benchmark each backend against it."""
+    database = workdir / 'retail.db'
+    counts = create_retail_sqlite(database, customers)
+
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for backend in backends:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results.append(pool.submit(run_backend, backend, str(database), str(workdir), batch_size).result())
+
+    return {
+        'benchmark': 'extract_backends',
+        'customers': customers,
+        'batch_size': batch_size,
+        'source_rows': counts,
+        'results': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the pandas, Arrow and DuckDB extraction backends')
+    parser.add_argument('--customers', type=int, default=20_000, help='Retail database size (orders = 3x, items = 9x)')
+    parser.add_argument('--batch-size', type=int, default=100_000, help='Rows per streamed batch')
+    parser.add_argument('--backends', nargs='+', default=['pandas', 'arrow', 'duckdb'], help='Backends to compare')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='pp-bench-') as tmp:
+        report = run_benchmark(args.customers, args.batch_size, args.backends, Path(tmp))
+
+    print(f"{'backend':<10} {'rows':>10} {'seconds':>9} {'rows/sec':>11} {'peak RSS MB':>12} {'VARCHAR cols':>13}")
+    for r in report['results']:
+        print(f"{r['backend']:<10} {r['rows']:>10} {r['seconds']:>9.2f} {r['rows_per_sec']:>11} "
+              f"{r['peak_rss_bytes'] / 1024 ** 2:>12.1f} {r['varchar_columns']:>13}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
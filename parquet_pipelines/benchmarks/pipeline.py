@@ -0,0 +1,229 @@
+"""
+End-to-end benchmark: extract the synthetic retail database and run the bundled models.
+
+    python -m parquet_pipelines.benchmarks.pipeline --scale 1 5 --output results.json
+    python -m parquet_pipelines.benchmarks.pipeline --scale 1 5 --compare results.json
+
+For each scale factor (1 = 10,000 customers, 90,000 order items) a fresh
+project is created with the retail SQLite source and the silver/gold models
+from sql/, then ``extract --all`` and a full pipeline run are timed. Each
+scale factor runs in its own process so peak memory is measured in isolation.
+Reports throughput, peak RSS and DuckLake storage size; ``--compare`` checks
+the timings against an earlier results file and exits non-zero on a
+regression.
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import yaml
+
+from parquet_pipelines.benchmarks.retail import RETAIL_DDL, create_retail_sqlite
+
+# Customers per scale factor; the other tables scale with it (see retail_row_counts)
+SCALE_FACTOR_CUSTOMERS = 10_000
+
+# Slowdown (in percent) that --compare reports as a regression
+DEFAULT_REGRESSION_THRESHOLD = 10.0
+
+# The repository's bundled silver/gold models
+BUNDLED_SQL_DIR = Path(__file__).resolve().parents[2] / 'sql'
+
+
+def _write_project(project: Path, database: Path, sql_dir: Path, workers: int):
+    """Lay out a project that extracts the retail database and runs the models in ``sql_dir``."""
+    shutil.copytree(sql_dir, project / 'sql')
+    config = project / 'config'
+    config.mkdir()
+    with open(config / 'source_tables.yml', 'w') as f:
+        yaml.dump({
+            'connection': {'type': 'sqlite', 'database': str(database)},
+            'workers': workers,
+            'tables': [{'name': table, 'schema': 'main'} for table in RETAIL_DDL],
+        }, f, sort_keys=False)
+    with open(config / 'pipeline.yml', 'w') as f:
+        yaml.dump({'name': 'benchmark', 'workers': workers}, f, sort_keys=False)
+
+
+def _phase(run, results: List[Dict]) -> Dict:
+    """Summarise one recorded run (extract or model build) for the report."""
+    rows = sum(s.rows_out or 0 for s in run.steps)
+    return {
+        'seconds': run.seconds,
+        'cpu_seconds': run.cpu_seconds,
+        'peak_rss_bytes': run.peak_rss_bytes,
+        'rows': rows,
+        'rows_per_sec': round(rows / run.seconds) if run.seconds else None,
+        'bytes_written': sum(s.bytes_written or 0 for s in run.steps),
+        'failed': [r['table'] for r in results if r['status'] == 'failed'],
+        'steps': {s.name: {'status': s.status, 'seconds': s.seconds, 'rows': s.rows_out}
+                  for s in run.steps},
+    }
+
+
+def run_scale_factor(scale: float, workdir: str, sql_dir: str, workers: int) -> Dict:
+    """Benchmark one scale factor in a fresh project under ``workdir`` (runs in a child process)."""
+    logging.disable(logging.INFO)
+    from parquet_pipelines.cli import ParquetPipelines
+
+    project = Path(workdir) / f"sf{scale:g}"
+    customers = int(SCALE_FACTOR_CUSTOMERS * scale)
+    project.mkdir(parents=True)
+    start = time.perf_counter()
+    source_rows = create_retail_sqlite(project / 'retail.db', customers)
+    generate_seconds = time.perf_counter() - start
+    _write_project(project, project / 'retail.db', Path(sql_dir), workers)
+
+    pp = ParquetPipelines(base_dir=project)
+    try:
+        source_config = pp.load_config('source_tables')
+        with pp.track_run('extract', 'benchmark') as extract_run:
+            extract_results = pp.extract_tables(source_config, source_config['tables'], force=True,
+                                                workers=workers)
+        with pp.track_run('run', 'benchmark') as model_run:
+            model_results = pp.run_pipeline(pp.load_config('pipeline'), force=True)
+
+        stats = pp.get_ducklake_stats()
+    finally:
+        pp.cleanup()
+
+    return {
+        'scale_factor': scale,
+        'customers': customers,
+        'source_rows': source_rows,
+        'generate_seconds': round(generate_seconds, 3),
+        'extract': _phase(extract_run, extract_results),
+        'run': _phase(model_run, model_results),
+        'storage': {
+            'data_files': stats['data_files'],
+            'data_bytes': stats['total_size_bytes'],
+            'catalog_bytes': pp.ducklake_catalog.stat().st_size,
+        },
+    }
+
+
+def _git_commit() -> Optional[str]:
+    """The checked-out commit of the repository the benchmark runs from, if it is one."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BUNDLED_SQL_DIR.parent,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(scales: List[float], workdir: Path, sql_dir: Path = BUNDLED_SQL_DIR,
+                  workers: int = 4) -> Dict:
+    """Benchmark every scale factor, smallest first, each in its own process."""
+    import duckdb
+
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for scale in sorted(scales):
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results.append(pool.submit(run_scale_factor, scale, str(workdir), str(sql_dir), workers).result())
+
+    return {
+        'benchmark': 'pipeline',
+        'commit': _git_commit(),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'duckdb': duckdb.__version__,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'workers': workers,
+        'results': results,
+    }
+
+
+def compare_results(baseline: Dict, current: Dict,
+                    threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> List[Dict]:
+    """Compare phase timings of two reports, matching results by scale factor.
+
+    Each entry gives the baseline and current seconds, the change in percent
+    and whether it is a slowdown beyond ``threshold`` percent.
+    """
+    earlier = {r['scale_factor']: r for r in baseline.get('results', [])}
+    changes = []
+    for result in current['results']:
+        before = earlier.get(result['scale_factor'])
+        if before is None:
+            continue
+        for phase in ('extract', 'run'):
+            old, new = before[phase]['seconds'], result[phase]['seconds']
+            change = (new - old) / old * 100 if old else None
+            changes.append({
+                'scale_factor': result['scale_factor'],
+                'phase': phase,
+                'baseline_seconds': old,
+                'seconds': new,
+                'change_pct': round(change, 1) if change is not None else None,
+                'regression': change is not None and change > threshold,
+            })
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark extract and model runs on the synthetic retail data')
+    parser.add_argument('--scale', type=float, nargs='+', default=[1.0],
+                        help=f'Scale factors to run (1 = {SCALE_FACTOR_CUSTOMERS:,} customers)')
+    parser.add_argument('--workers', type=int, default=4, help='Tables/models processed concurrently')
+    parser.add_argument('--sql-dir', type=Path, default=BUNDLED_SQL_DIR, help='Models to run (default: bundled sql/)')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--compare', help='Earlier results file to check for regressions')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help='Slowdown in percent that counts as a regression')
+    parser.add_argument('--keep', type=Path, help='Keep the generated projects in this directory')
+    args = parser.parse_args()
+
+    if args.keep:
+        args.keep.mkdir(parents=True, exist_ok=True)
+        report = run_benchmark(args.scale, args.keep, args.sql_dir, args.workers)
+    else:
+        with tempfile.TemporaryDirectory(prefix='pp-bench-') as tmp:
+            report = run_benchmark(args.scale, Path(tmp), args.sql_dir, args.workers)
+
+    print(f"{'scale':>6} {'phase':<8} {'rows':>10} {'seconds':>9} {'rows/sec':>10} {'peak RSS MB':>12} {'failed':>7}")
+    for r in report['results']:
+        for phase in ('extract', 'run'):
+            p = r[phase]
+            print(f"{r['scale_factor']:>6g} {phase:<8} {p['rows']:>10} {p['seconds']:>9.2f} "
+                  f"{p['rows_per_sec'] or 0:>10} {p['peak_rss_bytes'] / 1024 ** 2:>12.1f} {len(p['failed']):>7}")
+        storage = r['storage']
+        print(f"{r['scale_factor']:>6g} {'storage':<8} {storage['data_files']:>10} files, "
+              f"{storage['data_bytes'] / 1024 ** 2:.1f} MB data, {storage['catalog_bytes'] / 1024 ** 2:.1f} MB catalog")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+    failed = any(r[phase]['failed'] for r in report['results'] for phase in ('extract', 'run'))
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        changes = compare_results(baseline, report, args.threshold)
+        print(f"\nCompared with {args.compare} (commit {baseline.get('commit') or 'unknown'}):")
+        for c in changes:
+            change = f"{c['change_pct']:+.1f}%" if c['change_pct'] is not None else '-'
+            flag = '  REGRESSION' if c['regression'] else ''
+            print(f"{c['scale_factor']:>6g} {c['phase']:<8} {c['baseline_seconds']:>9.2f}s -> "
+                  f"{c['seconds']:>9.2f}s {change:>8}{flag}")
+        if any(c['regression'] for c in changes):
+            return 1
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
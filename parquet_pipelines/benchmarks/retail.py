@@ -0,0 +1,213 @@
+"""
+Synthetic retail source database modelled on sample_data/ (SampleRetailDB).
+
+Creates a SQLite file with the sample's tables and declared column types
+(NVARCHAR, DECIMAL, DATETIME, ...), scaled by the number of customers, so
+extraction can be exercised without a SQL Server. Values are derived from row
+numbers, so the same size always produces the same data.
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import Dict
+
+# SQL Server types from sample_data/ with their SQLite spelling: DATETIME2
+# becomes DATETIME and BIT becomes BOOLEAN so SQLAlchemy reflects them as such.
+# products also carries its category name, which the bundled sql/ models read.
+RETAIL_DDL = {
+    'customers': """
+        CREATE TABLE customers (
+            customer_id INTEGER PRIMARY KEY,
+            first_name NVARCHAR(50) NOT NULL,
+            last_name NVARCHAR(50) NOT NULL,
+            email NVARCHAR(100) NOT NULL,
+            phone NVARCHAR(20),
+            address NVARCHAR(200),
+            city NVARCHAR(50),
+            state NVARCHAR(50),
+            zip_code NVARCHAR(10),
+            date_of_birth DATE,
+            created_date DATETIME,
+            updated_date DATETIME,
+            active BOOLEAN,
+            customer_type NVARCHAR(20)
+        )""",
+    'products': """
+        CREATE TABLE products (
+            product_id INTEGER PRIMARY KEY,
+            product_name NVARCHAR(100) NOT NULL,
+            category_id INTEGER,
+            category NVARCHAR(50),
+            price DECIMAL(10,2) NOT NULL,
+            cost DECIMAL(10,2) NOT NULL,
+            sku NVARCHAR(50),
+            description NVARCHAR(500),
+            weight_lbs DECIMAL(8,2),
+            dimensions NVARCHAR(50),
+            supplier NVARCHAR(100),
+            created_date DATETIME,
+            updated_date DATETIME,
+            active BOOLEAN,
+            stock_quantity INTEGER
+        )""",
+    'orders': """
+        CREATE TABLE orders (
+            order_id INTEGER PRIMARY KEY,
+            customer_id INTEGER,
+            order_date DATETIME NOT NULL,
+            ship_date DATETIME,
+            delivery_date DATETIME,
+            status NVARCHAR(20),
+            shipping_address NVARCHAR(200),
+            shipping_city NVARCHAR(50),
+            shipping_state NVARCHAR(50),
+            shipping_zip NVARCHAR(10),
+            payment_method NVARCHAR(50),
+            subtotal DECIMAL(10,2),
+            tax_amount DECIMAL(10,2),
+            shipping_cost DECIMAL(10,2),
+            total_amount DECIMAL(10,2),
+            created_date DATETIME,
+            notes NVARCHAR(500)
+        )""",
+    'order_items': """
+        CREATE TABLE order_items (
+            order_item_id INTEGER PRIMARY KEY,
+            order_id INTEGER,
+            product_id INTEGER,
+            quantity INTEGER NOT NULL,
+            unit_price DECIMAL(10,2) NOT NULL,
+            line_total DECIMAL(10,2),
+            discount_amount DECIMAL(10,2)
+        )""",
+    'customer_loyalty': """
+        CREATE TABLE customer_loyalty (
+            loyalty_id INTEGER PRIMARY KEY,
+            customer_id INTEGER,
+            program_name NVARCHAR(50),
+            points_balance INTEGER,
+            tier_level NVARCHAR(20),
+            enrollment_date DATETIME,
+            last_activity_date DATETIME,
+            active BOOLEAN
+        )""",
+    'product_reviews': """
+        CREATE TABLE product_reviews (
+            review_id INTEGER PRIMARY KEY,
+            product_id INTEGER,
+            customer_id INTEGER,
+            rating INTEGER,
+            review_title NVARCHAR(100),
+            review_text NVARCHAR(1000),
+            review_date DATETIME,
+            helpful_votes INTEGER,
+            verified_purchase BOOLEAN
+        )""",
+}
+
+_SERIES = "WITH RECURSIVE r(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM r WHERE i < ?)"
+
+RETAIL_INSERTS = {
+    'customers': f"""
+        {_SERIES}
+        INSERT INTO customers
+        SELECT i, 'First' || i, 'Last' || (i % 997), 'customer' || i || '@example.com',
+               '555-' || printf('%04d', i % 10000), i || ' Main St', 'City' || (i % 250),
+               CASE i % 5 WHEN 0 THEN 'NY' WHEN 1 THEN 'CA' WHEN 2 THEN 'TX' WHEN 3 THEN 'IL' ELSE 'WA' END,
+               printf('%05d', i % 99999), date('1950-01-01', '+' || (i * 37 % 20000) || ' days'),
+               datetime('2023-01-01', '+' || (i % 700) || ' days', '+' || (i % 86400) || ' seconds'),
+               datetime('2024-06-01', '+' || (i % 300) || ' days'),
+               i % 20 != 0,
+               CASE i % 10 WHEN 0 THEN 'VIP' WHEN 1 THEN 'Premium' WHEN 2 THEN 'Premium' ELSE 'Regular' END
+        FROM r""",
+    'products': f"""
+        {_SERIES}
+        INSERT INTO products
+        SELECT i, 'Product ' || i, i % 6 + 1,
+               CASE i % 6 WHEN 0 THEN 'Electronics' WHEN 1 THEN 'Clothing' WHEN 2 THEN 'Home & Garden'
+                          WHEN 3 THEN 'Sports' WHEN 4 THEN 'Books' ELSE 'Beauty' END,
+               round(5 + (i * 7919 % 20000) / 100.0, 2),
+               round((5 + (i * 7919 % 20000) / 100.0) * 0.55, 2), 'SKU-' || printf('%06d', i),
+               'Description of product ' || i, round(0.1 + (i % 500) / 10.0, 2),
+               CASE WHEN i % 3 = 0 THEN NULL ELSE (i % 40) || 'x' || (i % 30) || 'x' || (i % 20) END,
+               'Supplier ' || (i % 40), datetime('2022-01-01', '+' || (i % 365) || ' days'),
+               datetime('2024-01-01', '+' || (i % 200) || ' days'), i % 25 != 0, i * 13 % 1000
+        FROM r""",
+    'orders': f"""
+        {_SERIES}
+        INSERT INTO orders
+        SELECT i, (i * 7 % ?) + 1,
+               datetime('2023-01-01', '+' || (i % 700) || ' days', '+' || (i * 13 % 86400) || ' seconds'),
+               CASE WHEN i % 4 = 0 THEN NULL ELSE datetime('2023-01-03', '+' || (i % 700) || ' days') END,
+               CASE WHEN i % 3 = 0 THEN NULL ELSE datetime('2023-01-06', '+' || (i % 700) || ' days') END,
+               CASE i % 4 WHEN 0 THEN 'PENDING' WHEN 1 THEN 'SHIPPED' ELSE 'DELIVERED' END,
+               i || ' Shipping Rd', 'City' || (i % 250), 'NY', printf('%05d', i % 99999),
+               CASE i % 3 WHEN 0 THEN 'Credit Card' WHEN 1 THEN 'PayPal' ELSE 'Debit Card' END,
+               round(10 + (i * 31 % 50000) / 100.0, 2), round((10 + (i * 31 % 50000) / 100.0) * 0.08, 2),
+               CASE WHEN i % 5 = 0 THEN 0 ELSE 5.99 END,
+               round((10 + (i * 31 % 50000) / 100.0) * 1.08 + CASE WHEN i % 5 = 0 THEN 0 ELSE 5.99 END, 2),
+               datetime('2023-01-01', '+' || (i % 700) || ' days'),
+               CASE WHEN i % 10 = 0 THEN 'Leave at the door' ELSE NULL END
+        FROM r""",
+    'order_items': f"""
+        {_SERIES}
+        INSERT INTO order_items
+        SELECT i, (i - 1) / 3 + 1, (i * 7 % ?) + 1, i % 4 + 1,
+               round(5 + (i * 7919 % 20000) / 100.0, 2),
+               round((i % 4 + 1) * (5 + (i * 7919 % 20000) / 100.0), 2),
+               CASE WHEN i % 7 = 0 THEN 2.50 ELSE 0 END
+        FROM r""",
+    'customer_loyalty': f"""
+        {_SERIES}
+        INSERT INTO customer_loyalty
+        SELECT i, i * 2, 'Rewards', i * 37 % 5000,
+               CASE i % 4 WHEN 0 THEN 'Gold' WHEN 1 THEN 'Silver' ELSE 'Bronze' END,
+               datetime('2023-01-01', '+' || (i % 500) || ' days'),
+               CASE WHEN i % 6 = 0 THEN NULL ELSE datetime('2024-06-01', '+' || (i % 100) || ' days') END,
+               i % 9 != 0
+        FROM r""",
+    'product_reviews': f"""
+        {_SERIES}
+        INSERT INTO product_reviews
+        SELECT i, (i * 11 % ?) + 1, (i * 17 % ?) + 1, i * 7 % 5 + 1,
+               CASE i * 7 % 5 WHEN 0 THEN 'Disappointed' WHEN 4 THEN 'Excellent' ELSE 'Good value' END,
+               'Review text ' || i || substr(' lorem ipsum dolor sit amet consectetur adipiscing elit', 1, i % 57),
+               datetime('2023-02-01', '+' || (i % 650) || ' days', '+' || (i * 29 % 86400) || ' seconds'),
+               i * 3 % 40, i % 4 != 0
+        FROM r""",
+}
+
+
+def retail_row_counts(customers: int) -> Dict[str, int]:
+    """Rows per table for a database with the given number of customers."""
+    return {
+        'customers': customers,
+        'products': max(50, customers // 100),
+        'orders': customers * 3,
+        'order_items': customers * 9,
+        'customer_loyalty': customers // 2,
+        'product_reviews': customers // 2,
+    }
+
+
+def create_retail_sqlite(path: Path, customers: int = 10_000) -> Dict[str, int]:
+    """Create (or replace) the retail database at ``path`` and return its row counts."""
+    path = Path(path)
+    path.unlink(missing_ok=True)
+    counts = retail_row_counts(customers)
+
+    conn = sqlite3.connect(path)
+    try:
+        for table, ddl in RETAIL_DDL.items():
+            conn.execute(ddl)
+        conn.execute(RETAIL_INSERTS['customers'], [counts['customers']])
+        conn.execute(RETAIL_INSERTS['products'], [counts['products']])
+        conn.execute(RETAIL_INSERTS['orders'], [counts['orders'], counts['customers']])
+        conn.execute(RETAIL_INSERTS['order_items'], [counts['order_items'], counts['products']])
+        conn.execute(RETAIL_INSERTS['customer_loyalty'], [counts['customer_loyalty']])
+        conn.execute(RETAIL_INSERTS['product_reviews'],
+                     [counts['product_reviews'], counts['products'], counts['customers']])
+        conn.commit()
+    finally:
+        conn.close()
+    return counts
@@ -0,0 +1,115 @@
+"""
+Benchmark CLI start-up: how long quick commands take in a fresh process.
+
+    python -m parquet_pipelines.benchmarks.startup --repeat 5 --output startup.json
+
+Times ``--help``, ``status`` and a one-row ``query`` against an already
+bootstrapped project, plus the bare import of the CLI module, each in a new
+interpreter. Also checks that importing the CLI doesn't load the extraction
+stack (pandas, pyarrow, SQLAlchemy, duckdb). Exits non-zero when a median
+exceeds ``--max-seconds`` or a heavy module is imported, so it can guard
+start-up time in CI.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+# Modules the CLI should only import in the commands that need them
+HEAVY_MODULES = ('duckdb', 'pandas', 'pyarrow', 'sqlalchemy')
+
+# Median wall time (seconds) a quick command may take
+DEFAULT_MAX_SECONDS = 1.0
+
+COMMANDS = {
+    'import': ['-c', 'import parquet_pipelines.cli'],
+    'help': ['-m', 'parquet_pipelines.cli', '--help'],
+    'status': ['-m', 'parquet_pipelines.cli', 'status'],
+    'query': ['-m', 'parquet_pipelines.cli', 'query', 'SELECT 1 AS ok'],
+}
+
+_PACKAGE_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _env() -> Dict[str, str]:
+    """Environment for child interpreters, importing this checkout of the package."""
+    return dict(os.environ, PYTHONPATH=str(_PACKAGE_ROOT))
+
+
+def _run(args: List[str], cwd: Path) -> float:
+    """Wall time of one fresh interpreter running ``args``."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable] + args, cwd=cwd, env=_env(), check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def heavy_imports(cwd: Path) -> List[str]:
+    """Heavy modules loaded by importing the CLI module."""
+    check = f"import sys, parquet_pipelines.cli; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    output = subprocess.run([sys.executable, '-c', check], cwd=cwd, env=_env(), check=True,
+                            capture_output=True, text=True).stdout.strip()
+    return [m for m in output.split(',') if m]
+
+
+def run_benchmark(project: Path, repeat: int = 5) -> Dict:
+    """Time each quick command ``repeat`` times in ``project`` (bootstrapped by a first status run)."""
+    _run(COMMANDS['status'], project)
+
+    results = {}
+    for name, args in COMMANDS.items():
+        times = [_run(args, project) for _ in range(repeat)]
+        results[name] = {
+            'median_seconds': round(statistics.median(times), 3),
+            'min_seconds': round(min(times), 3),
+            'max_seconds': round(max(times), 3),
+        }
+    return {
+        'benchmark': 'startup',
+        'python': sys.version.split()[0],
+        'repeat': repeat,
+        'heavy_imports': heavy_imports(project),
+        'commands': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CLI start-up time')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per command')
+    parser.add_argument('--max-seconds', type=float, default=DEFAULT_MAX_SECONDS,
+                        help='Fail if a command\'s median exceeds this')
+    parser.add_argument('--project', type=Path, help='Existing project to run in (default: a new empty one)')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    args = parser.parse_args()
+
+    if args.project:
+        report = run_benchmark(args.project, args.repeat)
+    else:
+        with tempfile.TemporaryDirectory(prefix='pp-startup-') as tmp:
+            report = run_benchmark(Path(tmp), args.repeat)
+
+    print(f"{'command':<10} {'median s':>9} {'min s':>7} {'max s':>7}")
+    slow = []
+    for name, r in report['commands'].items():
+        flag = ''
+        if r['median_seconds'] > args.max_seconds:
+            slow.append(name)
+            flag = '  over budget'
+        print(f"{name:<10} {r['median_seconds']:>9.3f} {r['min_seconds']:>7.3f} {r['max_seconds']:>7.3f}{flag}")
+    if report['heavy_imports']:
+        print(f"Importing the CLI loads: {', '.join(report['heavy_imports'])}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    return 1 if slow or report['heavy_imports'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,221 @@
+"""
+Dependency graph of SQL models built from their ``-- depends_on:`` headers.
+
+Subsets of the graph are picked with selectors: ``orders_cleaned`` (a model
+or source, bare or qualified, ``gold.*`` globs allowed), ``+orders_cleaned``
+(it and everything it reads from), ``orders_cleaned+`` (it and everything
+downstream of it) or ``+orders_cleaned+`` (both).
+"""
+
+import fnmatch
+import re
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+# Layers whose tables are produced by SQL models; anything else (bronze) is a source
+MODEL_LAYERS = ('silver', 'gold')
+
+
+class DagValidationError(ValueError):
+    """Raised when the model graph has missing inputs or cycles."""
+
+    def __init__(self, problems: List[str]):
+        self.problems = problems
+        super().__init__("Invalid pipeline graph:\n  " + "\n  ".join(problems))
+
+
+class ModelNode:
+    """A single SQL model: the table it builds and the tables it reads."""
+
+    def __init__(self, name: str, layer: str, path: Path, depends_on: List[str],
+                 metadata: Optional[Dict] = None):
+        self.name = name
+        self.layer = layer
+        self.path = path
+        self.depends_on = depends_on
+        self.metadata = metadata or {}
+
+    @property
+    def table(self) -> str:
+        """Fully qualified table name, e.g. ``silver.orders_cleaned``."""
+        return f"{self.layer}.{self.name}"
+
+    def __repr__(self):
+        return f"ModelNode({self.table})"
+
+
+class ModelDag:
+    """Directed acyclic graph of SQL models keyed by qualified table name."""
+
+    def __init__(self, nodes: Iterable[ModelNode]):
+        self.nodes: Dict[str, ModelNode] = {}
+        for node in nodes:
+            if node.table in self.nodes:
+                raise DagValidationError([
+                    f"{node.table} is built by both {self.nodes[node.table].path} and {node.path}"
+                ])
+            self.nodes[node.table] = node
+
+    @classmethod
+    def from_sql_dir(cls, sql_dir: Path, parse_metadata: Callable[[str], Dict]) -> 'ModelDag':
+        """Build the graph from every ``*.sql`` file under sql/silver and sql/gold."""
+        nodes = []
+        for layer in MODEL_LAYERS:
+            for path in sorted((sql_dir / layer).glob('*.sql')):
+                nodes.append(cls.node_from_file(path, layer, parse_metadata))
+        return cls(nodes)
+
+    @staticmethod
+    def node_from_file(path: Path, layer: str, parse_metadata: Callable[[str], Dict]) -> ModelNode:
+        """Create a node from a SQL file's metadata header."""
+        metadata = parse_metadata(path.read_text())
+        depends_on = [d.strip() for d in metadata.get('depends_on', '').split(',') if d.strip()]
+        return ModelNode(
+            name=metadata.get('name', path.stem),
+            layer=metadata.get('layer', layer),
+            path=path,
+            depends_on=depends_on,
+            metadata=metadata
+        )
+
+    def validate(self, sources: Optional[Set[str]] = None, tables: Optional[Iterable[str]] = None) -> List[str]:
+        """Check the graph and raise DagValidationError on missing model inputs or cycles.
+
+        Dependencies on model layers must be built by a model in the graph.
+        Other dependencies (bronze) are sources; if ``sources`` is given, any
+        not in it are returned as warnings rather than raised.
+
+        With ``tables``, only those models and the models they read from are
+        checked strictly; problems elsewhere in the graph are returned as
+        warnings, so a broken model doesn't stop runs that don't need it.
+        """
+        checked = None if tables is None else set(tables) | self.upstream(tables)
+        problems = []
+        warnings = []
+        for node in self.nodes.values():
+            strict = checked is None or node.table in checked
+            for dep in node.depends_on:
+                if dep in self.nodes:
+                    continue
+                if dep.split('.')[0] in MODEL_LAYERS:
+                    problem = f"{node.table} ({node.path.name}) depends on {dep}, which no model builds"
+                    (problems if strict else warnings).append(problem)
+                elif sources is not None and dep not in sources:
+                    warnings.append(f"{node.table} depends on source {dep}, which is not configured or extracted")
+
+        cycle = self._find_cycle(checked)
+        if cycle:
+            problems.append("Dependency cycle: " + " -> ".join(cycle))
+        elif checked is not None:
+            cycle = self._find_cycle()
+            if cycle:
+                warnings.append("Dependency cycle: " + " -> ".join(cycle))
+
+        if problems:
+            raise DagValidationError(problems)
+        return warnings
+
+    def _find_cycle(self, tables: Optional[Iterable[str]] = None) -> Optional[List[str]]:
+        """Return one dependency cycle as a list of tables, or None.
+
+        ``tables`` limits the search to cycles reachable from those models.
+        """
+        visiting, done = set(), set()
+        stack: List[str] = []
+
+        def visit(table: str) -> Optional[List[str]]:
+            visiting.add(table)
+            stack.append(table)
+            for dep in self.nodes[table].depends_on:
+                if dep not in self.nodes or dep in done:
+                    continue
+                if dep in visiting:
+                    return stack[stack.index(dep):] + [dep]
+                cycle = visit(dep)
+                if cycle:
+                    return cycle
+            visiting.discard(table)
+            done.add(table)
+            stack.pop()
+            return None
+
+        for table in (self.nodes if tables is None else tables):
+            if table not in done:
+                cycle = visit(table)
+                if cycle:
+                    return cycle
+        return None
+
+    def model_dependencies(self, table: str, within: Optional[Set[str]] = None) -> Set[str]:
+        """Direct dependencies of a model that are themselves models (optionally within a subset)."""
+        deps = {d for d in self.nodes[table].depends_on if d in self.nodes}
+        return deps & within if within is not None else deps
+
+    def topological_order(self, tables: Optional[Iterable[str]] = None) -> List[str]:
+        """Order models so every model comes after the models it depends on.
+
+        Ties keep the order in which tables were given (or graph order), so the
+        result is deterministic.
+        """
+        selected = list(tables) if tables is not None else list(self.nodes)
+        within = set(selected)
+        remaining = {t: self.model_dependencies(t, within) for t in selected}
+        order = []
+        while remaining:
+            ready = [t for t in selected if t in remaining and not remaining[t]]
+            if not ready:
+                raise DagValidationError(["Dependency cycle among: " + ", ".join(sorted(remaining))])
+            for table in ready:
+                order.append(table)
+                del remaining[table]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return order
+
+    def downstream(self, tables: Iterable[str]) -> Set[str]:
+        """Models that read any of ``tables`` (models or sources), directly or transitively."""
+        found: Set[str] = set()
+        frontier = set(tables)
+        while frontier:
+            frontier = {t for t, node in self.nodes.items()
+                        if t not in found and frontier.intersection(node.depends_on)}
+            found |= frontier
+        return found
+
+    def upstream(self, tables: Iterable[str]) -> Set[str]:
+        """Models that any of ``tables`` read from, directly or transitively."""
+        found: Set[str] = set()
+        frontier = {t for t in tables if t in self.nodes}
+        while frontier:
+            frontier = {d for t in frontier for d in self.model_dependencies(t)} - found
+            found |= frontier
+        return found
+
+    def select(self, selectors: Iterable[str], sources: Optional[Set[str]] = None) -> List[str]:
+        """Models picked by any of ``selectors`` (see the module docstring), in graph order.
+
+        Each item may hold several selectors separated by commas or spaces.
+        Names resolve against the models and the sources they read, plus
+        ``sources`` (e.g. the configured extracts); a bare name matches in any
+        layer. Sources themselves are never selected, only models around them.
+        Raises ValueError for a selector that matches nothing.
+        """
+        known = set(self.nodes) | {d for node in self.nodes.values() for d in node.depends_on}
+        known |= set(sources or ())
+        selected: Set[str] = set()
+        for selector in (s for item in selectors for s in re.split(r'[\s,]+', item) if s):
+            pattern = selector.strip()
+            with_upstream, with_downstream = pattern.startswith('+'), pattern.endswith('+')
+            pattern = pattern.strip('+').lower()
+            if not pattern:
+                raise ValueError(f"Invalid selector: {selector!r}")
+            matches = {t for t in known if fnmatch.fnmatchcase(t, pattern)
+                       or ('.' not in pattern and fnmatch.fnmatchcase(t.split('.', 1)[-1], pattern))}
+            if not matches:
+                raise ValueError(f"Selector {selector!r} matches no model or source")
+            selected |= matches & set(self.nodes)
+            if with_upstream:
+                selected |= self.upstream(matches)
+            if with_downstream:
+                selected |= self.downstream(matches)
+        return [t for t in self.nodes if t in selected]
@@ -0,0 +1,173 @@
+"""
+Native extraction: let DuckDB read a source itself instead of pulling rows through Python.
+
+SQLite, PostgreSQL and MySQL sources are attached read-only through DuckDB's
+scanner extensions, and file drops (a ``files`` source, or any table with a
+``file``) are read with read_parquet/read_csv/read_json, so a table is
+extracted by a single ``CREATE TABLE bronze.x AS SELECT ... FROM <source>``
+that DuckDB runs on its own threads. Sources DuckDB can't read (SQL Server)
+go through SQLAlchemy instead.
+
+This module only builds the SQL; running it is up to the caller.
+"""
+
+import re
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+# Connection types DuckDB can attach, mapped to the ATTACH ... (TYPE x) name
+ATTACH_TYPES = {'sqlite': 'sqlite', 'postgres': 'postgres', 'postgresql': 'postgres', 'mysql': 'mysql'}
+
+# Connection type for a directory of files; its tables name a ``file`` (glob) under ``path``
+FILES_TYPE = 'files'
+
+FILE_READERS = {'parquet': 'read_parquet', 'csv': 'read_csv', 'json': 'read_json'}
+
+_FILE_SUFFIXES = {
+    '.parquet': 'parquet', '.pq': 'parquet',
+    '.csv': 'csv', '.tsv': 'csv', '.txt': 'csv',
+    '.json': 'json', '.jsonl': 'json', '.ndjson': 'json',
+}
+
+# Functions that run a query on an attached database in its own dialect
+_PASSTHROUGH = {'postgres': 'postgres_query', 'mysql': 'mysql_query'}
+
+# Libpq/MySQL connection-string keys, and the source_tables.yml keys they are read from
+_CONNECTION_KEYS = {
+    'postgres': (('host', ('host', 'server')), ('port', ('port',)), ('dbname', ('database',)),
+                 ('user', ('username', 'user')), ('password', ('password',))),
+    'mysql': (('host', ('host', 'server')), ('port', ('port',)), ('database', ('database',)),
+              ('user', ('username', 'user')), ('password', ('password',))),
+}
+
+# SQLite declared types the scanner would widen (to DOUBLE/BIGINT) that are cast back
+_SQLITE_DECIMAL = re.compile(r'^\s*(?:DECIMAL|NUMERIC)\s*\(\s*(\d+)\s*(?:,\s*(\d+)\s*)?\)', re.IGNORECASE)
+_SQLITE_BOOLEAN = re.compile(r'^\s*(?:BOOLEAN|BOOL|BIT)\b', re.IGNORECASE)
+
+
+def can_read_natively(connection: Dict, table_config: Dict) -> bool:
+    """True if DuckDB can read the table itself (see table_relation)."""
+    if table_config.get('file'):
+        return True
+    db_type = str(connection.get('type', 'mssql')).lower()
+    if db_type == FILES_TYPE:
+        return True
+    if db_type not in ATTACH_TYPES:
+        return False
+    # SQLite has no pass-through function, so its custom queries go through SQLAlchemy
+    return not table_config.get('query') or ATTACH_TYPES[db_type] in _PASSTHROUGH
+
+
+def attach_target(connection: Dict, base_dir: Path) -> Tuple[str, str]:
+    """The path or connection string to ATTACH for a database source, and its TYPE.
+
+    PostgreSQL and MySQL take a ``dsn`` as is, or one is built from host/
+    port/database/username/password; a relative SQLite path is relative to
+    ``base_dir``.
+    """
+    db_type = ATTACH_TYPES[str(connection['type']).lower()]
+    if db_type == 'sqlite':
+        database = Path(connection['database'])
+        return str(database if database.is_absolute() else base_dir / database), db_type
+    if connection.get('dsn'):
+        return connection['dsn'], db_type
+    parts = []
+    for key, config_keys in _CONNECTION_KEYS[db_type]:
+        value = next((connection[k] for k in config_keys if connection.get(k) is not None), None)
+        if value is not None:
+            parts.append(f"{key}={value}")
+    return ' '.join(parts), db_type
+
+
+def attach_sql(alias: str, target: str, db_type: str) -> str:
+    """ATTACH statement mounting a source database read-only as ``alias``."""
+    return f"ATTACH {sql_literal(target)} AS {alias} (TYPE {db_type}, READ_ONLY)"
+
+
+def table_relation(connection: Dict, table_config: Dict, alias: Optional[str], base_dir: Path) -> str:
+    """DuckDB relation (a table reference or function call) reading one source table.
+
+    ``alias`` is the attached source database (None for file sources).
+    Files are matched relative to the ``files`` source's ``path`` (or
+    ``base_dir``); ``format`` overrides the reader picked from the file
+    suffix and ``read_options`` are passed on to it, e.g. ``{delim: ';'}``.
+    A custom ``query`` runs on PostgreSQL/MySQL in their own dialect.
+    """
+    db_type = str(connection.get('type', 'mssql')).lower()
+    file = table_config.get('file')
+    if file or db_type == FILES_TYPE:
+        root = Path(connection.get('path', '.')) if db_type == FILES_TYPE else Path('.')
+        if not root.is_absolute():
+            root = base_dir / root
+        path = root / (file or f"{table_config['name']}.parquet")
+        file_format = table_config.get('format') or _FILE_SUFFIXES.get(_suffix(path))
+        if file_format not in FILE_READERS:
+            raise ValueError(f"Cannot tell the format of {path}; set format to one of {', '.join(FILE_READERS)}")
+        arguments = [sql_literal(str(path))]
+        arguments += [f"{key} = {sql_value(value)}" for key, value in (table_config.get('read_options') or {}).items()]
+        return f"{FILE_READERS[file_format]}({', '.join(arguments)})"
+
+    attach_type = ATTACH_TYPES[db_type]
+    if table_config.get('query'):
+        return f"{_PASSTHROUGH[attach_type]}({sql_literal(alias)}, {sql_literal(table_config['query'])})"
+    name = quote_identifier(table_config['name'])
+    if attach_type == 'sqlite':
+        casts = sqlite_declared_casts(attach_target(connection, base_dir)[0], table_config['name'])
+        if casts:
+            replaced = ', '.join(f"CAST({quote_identifier(c)} AS {t}) AS {quote_identifier(c)}" for c, t in casts.items())
+            return f"(SELECT * REPLACE ({replaced}) FROM {alias}.{name})"
+        return f"{alias}.{name}"
+    # An attached database's default schema is public (PostgreSQL) or the database (MySQL)
+    if table_config.get('schema'):
+        return f"{alias}.{quote_identifier(table_config['schema'])}.{name}"
+    return f"{alias}.{name}"
+
+
+def sqlite_declared_casts(database: str, table: str) -> Dict[str, str]:
+    """DuckDB types for SQLite columns declared DECIMAL(p,s) or BOOLEAN, keyed by column name.
+
+    DuckDB's SQLite scanner reads these as DOUBLE and BIGINT; casting them
+    back keeps decimals exact and booleans boolean, as the arrow backend does.
+    """
+    with sqlite3.connect(f"file:{database}?mode=ro", uri=True) as source:
+        columns = source.execute(f"PRAGMA table_info({quote_identifier(table)})").fetchall()
+    casts = {}
+    for _, column, declared, *_ in columns:
+        decimal = _SQLITE_DECIMAL.match(declared or '')
+        if decimal and int(decimal.group(1)) <= 38:
+            casts[column] = f"DECIMAL({decimal.group(1)}, {decimal.group(2) or 0})"
+        elif _SQLITE_BOOLEAN.match(declared or ''):
+            casts[column] = 'BOOLEAN'
+    return casts
+
+
+def sql_literal(value: str) -> str:
+    """A single-quoted SQL string literal."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def sql_value(value: Any) -> str:
+    """A YAML value as a DuckDB literal: strings, numbers, booleans, lists and (struct) maps."""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, (list, tuple)):
+        return '[' + ', '.join(sql_value(v) for v in value) + ']'
+    if isinstance(value, dict):
+        return '{' + ', '.join(f"{sql_literal(k)}: {sql_value(v)}" for k, v in value.items()) + '}'
+    return sql_literal(value)
+
+
+def quote_identifier(name: str) -> str:
+    """A double-quoted SQL identifier."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _suffix(path: Path) -> str:
+    """File suffix ignoring a compression suffix (orders.csv.gz -> .csv)."""
+    suffixes = [s.lower() for s in path.suffixes]
+    if suffixes and suffixes[-1] in ('.gz', '.zst', '.zstd'):
+        suffixes.pop()
+    return suffixes[-1] if suffixes else ''
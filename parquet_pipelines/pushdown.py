@@ -0,0 +1,312 @@
+"""
+Projection and filter pushdown from the models reading a bronze table into its extract.
+
+The models that read a bronze table are parsed with DuckDB's
+``json_serialize_sql`` to find which of the table's columns they use and
+which rows they keep. The extract can then select just those columns, and,
+when every place the table is read filters it, just the rows that pass at
+least one of those filters.
+
+The analysis errs towards reading more. Anything it can't follow keeps every
+column: ``SELECT *``, ``t.*``, ``COLUMNS()``, NATURAL joins, the table used as
+a row value, or a statement mentioning the table that DuckDB can't
+serialise. A read whose filter isn't plain comparisons of the table's columns
+with constants keeps every row, and so does a read from the null-supplying
+side of an outer join. Filters are rendered as portable SQL (quoted
+identifiers, plain literals) that SQL Server, SQLite and DuckDB all accept.
+"""
+
+import json
+import re
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from parquet_pipelines.native_source import quote_identifier, sql_literal
+from parquet_pipelines.statements import split_statements
+
+# Statement prefixes (after any leading comments) in front of the query a model builds its table from
+_QUERY_PREFIX = re.compile(
+    r"""^(?:\s*--[^\n]*\n|\s*/\*[\s\S]*?\*/)*\s*(?:
+        CREATE\s+(?:OR\s+REPLACE\s+)?(?:TEMP(?:ORARY)?\s+)?(?:TABLE|VIEW)\s+(?:IF\s+NOT\s+EXISTS\s+)?[\w."]+\s+AS\s+
+      | INSERT\s+(?:OR\s+\w+\s+)?INTO\s+[\w."]+\s*(?:\([^)]*\)\s*)?(?:BY\s+NAME\s+)?
+    )""",
+    re.IGNORECASE | re.VERBOSE
+)
+
+# Template placeholders such as {{ incremental_filter('order_date') }}
+_PLACEHOLDER = re.compile(r'\{\{.*?\}\}', re.DOTALL)
+
+_COMPARISONS = {
+    'COMPARE_EQUAL': '=', 'COMPARE_NOTEQUAL': '<>', 'COMPARE_LESSTHAN': '<',
+    'COMPARE_GREATERTHAN': '>', 'COMPARE_LESSTHANOREQUALTO': '<=', 'COMPARE_GREATERTHANOREQUALTO': '>=',
+}
+_FLIPPED = {'<': '>', '>': '<', '<=': '>=', '>=': '<=', '=': '=', '<>': '<>'}
+
+# Joins under which a table's rows are only kept if they match (so its WHERE filters can move to the source)
+_FILTERING_JOINS = ('INNER', 'SEMI', 'ANTI')
+
+
+class Pushdown:
+    """The columns and rows of a source table its readers need; None means all of them."""
+
+    def __init__(self, columns: Optional[List[str]] = None, row_filter: Optional[str] = None):
+        self.columns = columns
+        self.row_filter = row_filter
+
+    def query(self, source: str) -> str:
+        """A SELECT of the needed columns and rows from ``source`` (a parenthesised query or a relation)."""
+        columns = ', '.join(quote_identifier(c) for c in self.columns) if self.columns else '*'
+        where = f" WHERE {self.row_filter}" if self.row_filter else ''
+        return f"SELECT {columns} FROM {source} AS src{where}"
+
+    def to_dict(self) -> Dict:
+        return {'columns': self.columns, 'filter': self.row_filter}
+
+
+def model_queries(sql: str) -> List[str]:
+    """The statements of a model file, with a CREATE/INSERT prefix cut off so only the query remains."""
+    sql = _PLACEHOLDER.sub('TRUE', sql)
+    return [_QUERY_PREFIX.sub('', statement, count=1) for statement in split_statements(sql)]
+
+
+def analyse(table: str, model_sql: List[str], source_columns: List[str],
+            serialize: Callable[[str], Dict]) -> Pushdown:
+    """Work out the Pushdown for ``table`` (e.g. ``bronze.orders``) from the SQL of the models reading it.
+
+    ``source_columns`` are the source table's columns and ``serialize`` runs
+    DuckDB's json_serialize_sql on one statement.
+    """
+    schema_name, table_name = table.lower().split('.', 1)
+    by_name = {c.lower(): c for c in source_columns}
+    mention = re.compile(rf'\b{re.escape(schema_name)}\s*\.\s*"?{re.escape(table_name)}\b', re.IGNORECASE)
+
+    columns: Optional[Set[str]] = set()
+    filters: Optional[List[str]] = []
+    for sql in model_sql:
+        for query in model_queries(sql):
+            if not mention.search(query):
+                continue
+            parsed = serialize(query)
+            if parsed.get('error') or not parsed.get('statements'):
+                return Pushdown()
+            reads = _Reads(parsed['statements'][0]['node'], schema_name, table_name, by_name)
+            if columns is not None:
+                columns = None if reads.all_columns else columns | reads.columns
+            if filters is not None:
+                for row_filter in reads.filters:
+                    if row_filter is None:
+                        filters = None
+                        break
+                    if row_filter not in filters:
+                        filters.append(row_filter)
+
+    if columns is not None and not columns and filters == []:
+        # Nothing reads the table
+        return Pushdown()
+    ordered = [c for c in source_columns if c in columns] if columns else None
+    row_filter = None
+    if filters:
+        row_filter = filters[0] if len(filters) == 1 else ' OR '.join(f"({f})" for f in filters)
+    return Pushdown(ordered, row_filter)
+
+
+class _Reads:
+    """The columns of one table a statement uses and the filter each of its reads of the table applies."""
+
+    def __init__(self, statement: Dict, schema_name: str, table_name: str, by_name: Dict[str, str]):
+        self.schema_name = schema_name
+        self.table_name = table_name
+        self.by_name = by_name
+        self.columns: Set[str] = set()
+        self.all_columns = False
+        # One entry per read of the table: its filter as SQL, or None if it keeps every row
+        self.filters: List[Optional[str]] = []
+        bindings: Set[str] = set()
+
+        for node in _walk(statement):
+            if node.get('type') == 'SELECT_NODE':
+                self._select(node, bindings)
+        for node in _walk(statement):
+            if node.get('class') == 'COLUMN_REF':
+                names = [n.lower() for n in node.get('column_names', [])]
+                if len(names) == 1 and names[0] in bindings:
+                    # The whole row as a struct value
+                    self.all_columns = True
+                self.columns.update(self.by_name[n] for n in names if n in self.by_name)
+            elif node.get('type') == 'JOIN':
+                if node.get('ref_type') == 'NATURAL':
+                    self.all_columns = True
+                self.columns.update(self.by_name[n.lower()] for n in node.get('using_columns', [])
+                                    if n.lower() in self.by_name)
+
+    def _select(self, node: Dict, bindings: Set[str]):
+        """Record the reads of the table directly in this SELECT's FROM clause."""
+        tables = list(_from_tables(node.get('from_table'), nullable=False))
+        reads = [(t, nullable) for t, nullable in tables if self._is_table(t)]
+        if not reads:
+            return
+        names = {(t.get('alias') or t.get('table_name', '')).lower() for t, _ in reads}
+        bindings.update(names)
+
+        for part in ('select_list', 'where_clause', 'group_expressions', 'having', 'qualify'):
+            for child in _walk(node.get(part)):
+                if child.get('class') == 'STAR' and (
+                        child.get('columns') or not child.get('relation_name')
+                        or child['relation_name'].lower() in names):
+                    self.all_columns = True
+
+        for table, nullable in reads:
+            binding = (table.get('alias') or table['table_name']).lower()
+            if nullable:
+                self.filters.append(None)
+                continue
+            only_table = len(tables) == 1
+            conjuncts = [self._render(c, binding, only_table) for c in _conjuncts(node.get('where_clause'))]
+            conjuncts = [c for c in conjuncts if c is not None]
+            self.filters.append(' AND '.join(conjuncts) if conjuncts else None)
+
+    def _is_table(self, table: Dict) -> bool:
+        return (table.get('type') == 'BASE_TABLE'
+                and table.get('schema_name', '').lower() == self.schema_name
+                and table.get('table_name', '').lower() == self.table_name)
+
+    def _render(self, expr: Dict, binding: str, only_table: bool, negated: bool = False) -> Optional[str]:
+        """Portable SQL for a filter on the table's columns and constants, or None if it can't be pushed.
+
+        Sources may compare text case-insensitively (SQL Server collations),
+        so text constants are only pushed in ``=`` and ``IN`` outside a NOT,
+        where such a source can only keep more rows than DuckDB would.
+        """
+        kind = expr.get('type')
+        if kind in ('CONJUNCTION_AND', 'CONJUNCTION_OR'):
+            parts = [self._render(c, binding, only_table, negated) for c in expr['children']]
+            if any(p is None for p in parts):
+                return None
+            joiner = ' AND ' if kind == 'CONJUNCTION_AND' else ' OR '
+            return '(' + joiner.join(parts) + ')'
+        if kind == 'OPERATOR_NOT':
+            inner = self._render(expr['children'][0], binding, only_table, not negated)
+            return None if inner is None else f"NOT ({inner})"
+        if kind in ('OPERATOR_IS_NULL', 'OPERATOR_IS_NOT_NULL'):
+            column = self._column(expr['children'][0], binding, only_table)
+            if column is None:
+                return None
+            return f"{column} IS {'NOT ' if kind == 'OPERATOR_IS_NOT_NULL' else ''}NULL"
+        if kind in _COMPARISONS:
+            op = _COMPARISONS[kind]
+            column, constant = self._column(expr['left'], binding, only_table), expr['right']
+            if column is None:
+                column, constant, op = self._column(expr['right'], binding, only_table), expr['left'], _FLIPPED[op]
+            value = _constant(constant)
+            if column is None or value is None or _is_text(constant) and (op != '=' or negated):
+                return None
+            return f"{column} {op} {value}"
+        if kind in ('COMPARE_IN', 'COMPARE_NOT_IN'):
+            column = self._column(expr['children'][0], binding, only_table)
+            constants = expr['children'][1:]
+            values = [_constant(c) for c in constants]
+            if column is None or not values or any(v is None for v in values):
+                return None
+            if any(_is_text(c) for c in constants) and (kind == 'COMPARE_NOT_IN' or negated):
+                return None
+            return f"{column} {'NOT ' if kind == 'COMPARE_NOT_IN' else ''}IN ({', '.join(values)})"
+        if kind == 'COMPARE_BETWEEN':
+            column = self._column(expr['input'], binding, only_table)
+            lower, upper = _constant(expr['lower']), _constant(expr['upper'])
+            if column is None or lower is None or upper is None or _is_text(expr['lower']) or _is_text(expr['upper']):
+                return None
+            return f"{column} BETWEEN {lower} AND {upper}"
+        return None
+
+    def _column(self, expr: Dict, binding: str, only_table: bool) -> Optional[str]:
+        """The quoted source column an expression refers to, if it is a column of this read of the table."""
+        if expr.get('class') != 'COLUMN_REF':
+            return None
+        names = [n.lower() for n in expr['column_names']]
+        if len(names) == 2 and names[0] == binding or len(names) == 1 and only_table:
+            column = self.by_name.get(names[-1])
+            return quote_identifier(column) if column else None
+        return None
+
+
+def _walk(node) -> Iterator[Dict]:
+    """Every dict in a serialised statement, depth first."""
+    if isinstance(node, dict):
+        yield node
+        for value in node.values():
+            yield from _walk(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _walk(value)
+
+
+def _from_tables(ref: Optional[Dict], nullable: bool) -> Iterator[Tuple[Dict, bool]]:
+    """Tables of a FROM clause (not inside subqueries), each with whether an outer join may null it."""
+    if not ref:
+        return
+    if ref.get('type') != 'JOIN':
+        yield ref, nullable
+        return
+    join_type = ref.get('join_type', 'INNER')
+    cross = ref.get('ref_type') == 'CROSS'
+    left_nullable = nullable or not (cross or join_type in _FILTERING_JOINS or join_type == 'LEFT')
+    right_nullable = nullable or not (cross or join_type in _FILTERING_JOINS or join_type == 'RIGHT')
+    yield from _from_tables(ref.get('left'), left_nullable)
+    yield from _from_tables(ref.get('right'), right_nullable)
+
+
+def _conjuncts(expr: Optional[Dict]) -> List[Dict]:
+    """The AND-ed terms of a WHERE clause."""
+    if not expr:
+        return []
+    if expr.get('type') == 'CONJUNCTION_AND':
+        return [term for child in expr['children'] for term in _conjuncts(child)]
+    return [expr]
+
+
+def _is_text(expr: Dict) -> bool:
+    """True for a string constant (not one cast to a date or timestamp)."""
+    return expr.get('class') == 'CONSTANT' and expr['value']['type']['id'] == 'VARCHAR'
+
+
+def _constant(expr: Dict) -> Optional[str]:
+    """A constant as a portable SQL literal, or None if it isn't one.
+
+    Dates and timestamps are written as strings, which SQL Server converts
+    implicitly, SQLite compares as text and DuckDB casts; booleans as 1/0.
+    """
+    if expr.get('class') == 'CAST':
+        inner = expr['child']
+        target = expr['cast_type']['id']
+        if inner.get('class') != 'CONSTANT' or inner['value'].get('is_null'):
+            return None
+        if target == 'BOOLEAN' and str(inner['value']['value']).lower() in ('t', 'true', 'f', 'false'):
+            return '1' if str(inner['value']['value']).lower() in ('t', 'true') else '0'
+        if target in ('DATE', 'TIMESTAMP', 'TIMESTAMP WITH TIME ZONE') and inner['value']['type']['id'] == 'VARCHAR':
+            return sql_literal(inner['value']['value'])
+        return None
+    if expr.get('class') != 'CONSTANT' or expr['value'].get('is_null'):
+        return None
+    value = expr['value']
+    type_id = value['type']['id']
+    if type_id == 'VARCHAR':
+        return sql_literal(value['value'])
+    if type_id == 'BOOLEAN':
+        return '1' if value['value'] else '0'
+    if type_id == 'DECIMAL':
+        scale = (value['type'].get('type_info') or {}).get('scale', 0)
+        unscaled = int(value['value'])
+        if not scale:
+            return str(unscaled)
+        sign, digits = ('-' if unscaled < 0 else ''), str(abs(unscaled)).rjust(scale + 1, '0')
+        return f"{sign}{digits[:-scale]}.{digits[-scale:]}"
+    if type_id in ('TINYINT', 'SMALLINT', 'INTEGER', 'BIGINT', 'HUGEINT', 'UTINYINT', 'USMALLINT',
+                   'UINTEGER', 'UBIGINT', 'FLOAT', 'DOUBLE'):
+        return repr(value['value'])
+    return None
+
+
+def serialize_with(conn) -> Callable[[str], Dict]:
+    """A ``serialize`` callable for analyse that parses statements on a DuckDB connection."""
+    def serialize(sql: str) -> Dict:
+        return json.loads(conn.execute(f"SELECT json_serialize_sql({sql_literal(sql)})").fetchone()[0])
+    return serialize
@@ -0,0 +1,269 @@
+"""
+Result cache for read-only DuckLake queries.
+
+Results are kept as Arrow tables keyed by the normalised SQL and the DuckLake
+snapshot the query ran against. Any commit creates a new snapshot, so a
+cached result is never served after the tables it read have changed; a query
+pinned to a version (``AT (VERSION => n)``) reads the same data forever and is
+cached without a snapshot. The in-memory cache is LRU-bounded by bytes, and
+evicted results can spill to Parquet files in a directory, where another
+process (or a later CLI invocation) can find them.
+
+Only queries whose result is fixed by the snapshot are cached: a single
+SELECT (parsed with DuckDB's ``json_serialize_sql``) whose every table is a
+base table of the DuckLake outside its ``main`` schema of state tables. Reads
+of other catalogs (attached or in-memory databases, temp tables), of views,
+unqualified names, table functions (read_parquet(), range(), ...), functions
+whose result changes between calls (random(), now(), ...) and unseeded
+samples all run every time.
+"""
+
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+_READ_ONLY = re.compile(r'^\s*\(?\s*(SELECT|WITH|FROM|VALUES)\b', re.IGNORECASE)
+
+# Functions whose result changes between calls
+VOLATILE_FUNCTIONS = frozenset({
+    'random', 'uuid', 'gen_random_uuid', 'uuidv4', 'uuidv7', 'setseed', 'now', 'today', 'get_current_timestamp',
+    'get_current_time', 'transaction_timestamp', 'current_setting', 'nextval', 'currval', 'getenv',
+})
+
+# Keywords DuckDB parses as column references but evaluates to the current time
+_TIME_KEYWORDS = frozenset({'current_date', 'current_time', 'current_timestamp', 'localtime', 'localtimestamp'})
+
+# Comments, string literals, quoted identifiers and runs of whitespace
+_TOKENS = re.compile(r"--[^\n]*|/\*.*?\*/|'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|\s+", re.DOTALL)
+
+
+def normalize_sql(sql: str) -> str:
+    """Drop comments, collapse whitespace outside literals and strip the trailing semicolon."""
+    def token(match) -> str:
+        text = match.group(0)
+        if text.startswith('--') or text.startswith('/*') or text[0].isspace():
+            return ' '
+        return text
+    return _TOKENS.sub(token, sql).strip().rstrip(';').strip()
+
+
+def read_tables(tree: Dict) -> Optional[Set[Tuple[str, str, str]]]:
+    """The tables a query reads, as lower-cased (catalog, schema, table), or None if it can't be cached.
+
+    ``tree`` is DuckDB's json_serialize_sql output for the query. Names are
+    as written (empty when left out), and references to the query's own CTEs
+    are left out. None for anything but a single SELECT, and for queries
+    calling a table function or a volatile function or taking an unseeded
+    sample.
+    """
+    if tree.get('error') or len(tree.get('statements', [])) != 1:
+        return None
+    tables: Set[Tuple[str, str, str]] = set()
+    if not _collect_tables(tree['statements'][0], frozenset(), tables):
+        return None
+    return tables
+
+
+def _collect_tables(node: Any, ctes: frozenset, tables: Set[Tuple[str, str, str]]) -> bool:
+    """Add the tables under ``node`` to ``tables``; False if it makes the query uncacheable."""
+    if isinstance(node, list):
+        return all(_collect_tables(child, ctes, tables) for child in node)
+    if not isinstance(node, dict):
+        return True
+
+    cte_map = node.get('cte_map')
+    if cte_map and cte_map.get('map'):
+        ctes = ctes | {entry['key'].lower() for entry in cte_map['map']}
+    kind = node.get('type')
+    if kind == 'TABLE_FUNCTION':
+        return False
+    if node.get('class') == 'FUNCTION' and node.get('function_name', '').lower() in VOLATILE_FUNCTIONS:
+        return False
+    names = node.get('column_names') if kind == 'COLUMN_REF' else None
+    if names and len(names) == 1 and names[0].lower() in _TIME_KEYWORDS:
+        return False
+    if isinstance(node.get('sample'), dict) and node['sample'].get('seed', -1) == -1:
+        return False
+    if kind == 'BASE_TABLE':
+        catalog, schema, table = (node.get(k, '').lower() for k in ('catalog_name', 'schema_name', 'table_name'))
+        if catalog or schema or table not in ctes:
+            tables.add((catalog, schema, table))
+    return all(_collect_tables(value, ctes, tables) for value in node.values())
+
+
+def is_cacheable(sql: str, serialize: Callable[[str], Dict], catalog: str,
+                 lake_tables: Callable[[], Set[Tuple[str, str]]]) -> bool:
+    """True for a read-only query whose result depends only on the DuckLake snapshot.
+
+    ``serialize`` runs json_serialize_sql on the query, ``catalog`` is the
+    DuckLake's name and ``lake_tables`` returns its base tables outside
+    ``main`` as lower-cased (schema, table). Tables must be named with their
+    schema: a bare name may resolve to a temp table or a state table.
+    """
+    if not _READ_ONLY.match(normalize_sql(sql)):
+        return False
+    try:
+        tables = read_tables(serialize(sql))
+    except Exception as e:
+        logger.debug(f"Could not parse query for the cache: {e}")
+        return False
+    if tables is None:
+        return False
+    if any(not schema or (table_catalog and table_catalog != catalog.lower())
+           for table_catalog, schema, _ in tables):
+        return False
+    return not tables or {(schema, table) for _, schema, table in tables} <= lake_tables()
+
+
+class QueryCache:
+    """LRU cache of Arrow query results, bounded by ``max_bytes``, with optional Parquet spill.
+
+    ``spill_dir`` receives results evicted from memory (and results too big
+    to keep in memory), up to ``max_spill_bytes``; the oldest files are
+    deleted beyond that. Entries for snapshots older than the latest one seen
+    are dropped from memory as soon as a newer snapshot turns up.
+    """
+
+    def __init__(self, max_bytes: int, spill_dir: Optional[Path] = None, max_spill_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.max_spill_bytes = max_spill_bytes
+        self._entries: 'OrderedDict[Tuple[str, Optional[int]], pa.Table]' = OrderedDict()
+        self._bytes = 0
+        self._snapshot: Optional[int] = None
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'spill_hits': 0, 'misses': 0, 'evictions': 0, 'spills': 0}
+        if self.spill_dir:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+
+    def get_or_run(self, sql: str, snapshot_id: Optional[int], run: Callable[[], pa.Table],
+                   variant: Optional[str] = None) -> pa.Table:
+        """Return the cached result of ``sql`` at ``snapshot_id`` or run it and cache the result.
+
+        ``snapshot_id`` is None for queries pinned to a version, and
+        ``variant`` tells apart results of the same SQL fetched differently
+        (e.g. with a row limit). Callers check the query with is_cacheable first.
+        """
+        normalized = normalize_sql(sql)
+        key = (normalized if variant is None else f"{normalized}\n{variant}", snapshot_id)
+        table = self._lookup(key)
+        if table is not None:
+            return table
+
+        table = run()
+        self._store(key, table)
+        return table
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and the current size of the cache."""
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['spill_hits'] + self._stats['misses']
+            return dict(
+                self._stats,
+                hit_rate=round((self._stats['hits'] + self._stats['spill_hits']) / lookups, 3) if lookups else None,
+                entries=len(self._entries),
+                bytes=self._bytes,
+                max_bytes=self.max_bytes,
+                spill_dir=str(self.spill_dir) if self.spill_dir else None,
+            )
+
+    def clear(self):
+        """Drop every in-memory entry (spilled files are left for other processes)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _lookup(self, key: Tuple[str, Optional[int]]) -> Optional[pa.Table]:
+        with self._lock:
+            self._see_snapshot(key[1])
+            table = self._entries.get(key)
+            if table is not None:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return table
+
+        path = self._spill_path(key)
+        if path is not None and path.exists():
+            try:
+                table = pq.read_table(path)
+            except Exception as e:
+                logger.debug(f"Could not read spilled query result {path}: {e}")
+            else:
+                with self._lock:
+                    self._stats['spill_hits'] += 1
+                    self._insert(key, table)
+                return table
+
+        with self._lock:
+            self._stats['misses'] += 1
+        return None
+
+    def _store(self, key: Tuple[str, Optional[int]], table: pa.Table):
+        with self._lock:
+            self._see_snapshot(key[1])
+            if table.nbytes > self.max_bytes:
+                self._spill(key, table)
+            else:
+                self._insert(key, table)
+
+    def _insert(self, key: Tuple[str, Optional[int]], table: pa.Table):
+        """Add an entry, evicting (and spilling) least recently used ones to stay within max_bytes."""
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key).nbytes
+        self._entries[key] = table
+        self._bytes += table.nbytes
+        while self._bytes > self.max_bytes and self._entries:
+            old_key, old_table = self._entries.popitem(last=False)
+            self._bytes -= old_table.nbytes
+            self._stats['evictions'] += 1
+            if old_key[1] is None or old_key[1] == self._snapshot:
+                self._spill(old_key, old_table)
+
+    def _see_snapshot(self, snapshot_id: Optional[int]):
+        """Forget in-memory results of older snapshots once a newer one is seen."""
+        if snapshot_id is None or (self._snapshot is not None and snapshot_id <= self._snapshot):
+            return
+        self._snapshot = snapshot_id
+        for key in [k for k in self._entries if k[1] is not None and k[1] != snapshot_id]:
+            self._bytes -= self._entries.pop(key).nbytes
+
+    def _spill_path(self, key: Tuple[str, Optional[int]]) -> Optional[Path]:
+        if self.spill_dir is None:
+            return None
+        digest = hashlib.sha256(f"{key[1]}\n{key[0]}".encode('utf-8')).hexdigest()
+        return self.spill_dir / f"{digest}.parquet"
+
+    def _spill(self, key: Tuple[str, Optional[int]], table: pa.Table):
+        """Write a result to the spill directory, then trim the directory to max_spill_bytes."""
+        path = self._spill_path(key)
+        if path is None or table.nbytes > self.max_spill_bytes:
+            return
+        try:
+            tmp = path.with_suffix('.tmp')
+            pq.write_table(table, tmp)
+            tmp.replace(path)
+        except Exception as e:
+            logger.debug(f"Could not spill query result to {path}: {e}")
+            return
+        self._stats['spills'] += 1
+
+        try:
+            files = sorted(((f.stat(), f) for f in self.spill_dir.glob('*.parquet')),
+                           key=lambda item: item[0].st_mtime, reverse=True)
+        except OSError:
+            # Another process trimmed the directory meanwhile
+            return
+        total = 0
+        for stat, file in files:
+            total += stat.st_size
+            if total > self.max_spill_bytes:
+                file.unlink(missing_ok=True)
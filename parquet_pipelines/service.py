@@ -0,0 +1,352 @@
+"""
+Pipeline service: keep one warm DuckLake connection and run jobs over a local HTTP API.
+
+    tealtarn serve --port 8765
+    tealtarn --server http://127.0.0.1:8765 run --pipeline main
+
+Every CLI invocation otherwise pays for loading DuckLake, attaching the
+catalog and creating schemas before doing any work. The service does that
+once and then runs extract/run/export/maintain jobs from a FIFO queue, one at a time
+(they write to the same catalog), while queries run alongside them on their
+own cursors. Source connection pools stay warm between jobs as well.
+
+Endpoints (JSON in and out):
+
+    GET  /health             service status, queue length and query cache statistics
+    GET  /jobs               recent jobs
+    GET  /status?runs=10     recorded run history (as the status command shows it)
+    POST /jobs               {"command": "run", "options": {"pipeline": true}} -> job
+    GET  /jobs/<id>?wait=30  a job, waiting up to 30s for it to finish
+    POST /query              {"sql": "SELECT ...", "limit": 1000} -> columns and rows
+                             (cached until the DuckLake changes; hit rates in /health)
+    POST /export             {"sql": "SELECT ...", "path": "/abs/out.parquet"} -> rows written
+    POST /shutdown           stop after the running job
+
+The API has no authentication, so it listens on the loopback interface
+unless told otherwise.
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import uuid
+from datetime import datetime
+from http import HTTPStatus
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Environment variable pointing the CLI at a running service
+SERVER_ENV = 'PARQUET_PIPELINES_SERVER'
+
+# Commands the service runs as queued jobs
+JOB_COMMANDS = ('extract', 'run', 'export', 'maintain')
+
+# Finished jobs kept for GET /jobs
+JOB_HISTORY = 200
+
+# Longest a single GET /jobs/<id>?wait= request blocks
+MAX_WAIT_SECONDS = 60
+
+# Rows returned by POST /query unless the request sets a limit
+DEFAULT_QUERY_LIMIT = 1000
+
+
+class Job:
+    """A queued command and, once it has run, its outcome."""
+
+    def __init__(self, command: str, options: Dict):
+        self.id = uuid.uuid4().hex
+        self.command = command
+        self.options = options
+        self.status = 'queued'
+        self.submitted_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.done = threading.Event()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'command': self.command,
+            'options': self.options,
+            'status': self.status,
+            'submitted_at': self.submitted_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'seconds': round((self.finished_at - self.started_at).total_seconds(), 3)
+                       if self.finished_at and self.started_at else None,
+            'result': self.result,
+            'error': self.error,
+        }
+
+
+class PipelineService:
+    """Runs submitted jobs one at a time against a single, warm ParquetPipelines.
+
+    Submitting a job identical to one still waiting in the queue returns the
+    waiting job instead of queueing a duplicate, so frequent triggers (cron,
+    notebooks) coalesce. ``runner(pp, command, options)`` executes a job.
+    """
+
+    def __init__(self, pp, runner: Callable[[Any, str, Dict], Any]):
+        self.pp = pp
+        self.runner = runner
+        self.started_at = datetime.now()
+        self._jobs: Dict[str, Job] = {}
+        self._queue: 'queue.Queue[Optional[Job]]' = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run_jobs, name='job-runner', daemon=True)
+
+    def start(self):
+        """Attach the DuckLake now, so the first job doesn't pay for it, and start the job runner."""
+        self.pp._get_duck_connection()
+        self._worker.start()
+
+    def stop(self):
+        """Let the running job finish, drop the queued ones and stop the job runner."""
+        with self._lock:
+            for job in self._jobs.values():
+                if job.status == 'queued':
+                    self._finish(job, 'cancelled', error='Service stopped')
+        self._queue.put(None)
+        self._worker.join()
+
+    def submit(self, command: str, options: Optional[Dict] = None) -> Job:
+        if command not in JOB_COMMANDS:
+            raise ValueError(f"Unknown command '{command}'; expected one of: {', '.join(JOB_COMMANDS)}")
+        options = options or {}
+        with self._lock:
+            for job in self._jobs.values():
+                if job.status == 'queued' and job.command == command and job.options == options:
+                    return job
+            job = Job(command, options)
+            self._jobs[job.id] = job
+            self._prune()
+        self._queue.put(job)
+        logger.info(f"Queued job {job.id}: {command} {options}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Job]:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda j: j.submitted_at, reverse=True)
+
+    def health(self) -> Dict[str, Any]:
+        jobs = self.jobs()
+        return {
+            'status': 'ok',
+            'pid': os.getpid(),
+            'base_dir': str(self.pp.base_dir),
+            'started_at': self.started_at.isoformat(),
+            'queued': sum(1 for j in jobs if j.status == 'queued'),
+            'running': next((j.id for j in jobs if j.status == 'running'), None),
+            'query_cache': self.pp.query_cache_stats(),
+        }
+
+    def _run_jobs(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            with self._lock:
+                if job.status != 'queued':
+                    continue
+                job.status = 'running'
+                job.started_at = datetime.now()
+            logger.info(f"Running job {job.id}: {job.command} {job.options}")
+            try:
+                result = self.runner(self.pp, job.command, job.options)
+                # Round-trip through JSON so results with paths, dates or decimals serialise
+                result = json.loads(json.dumps(result, default=str))
+                failed = job.command == 'extract' and isinstance(result, list) and \
+                    any(r.get('status') == 'failed' for r in result)
+                with self._lock:
+                    job.result = result
+                    self._finish(job, 'failed' if failed else 'succeeded',
+                                 error='Some tables failed to extract' if failed else None)
+            except Exception as e:
+                logger.error(f"Job {job.id} failed: {e}")
+                with self._lock:
+                    self._finish(job, 'failed', error=str(e))
+
+    def _finish(self, job: Job, status: str, error: Optional[str] = None):
+        job.status = status
+        job.error = error
+        job.finished_at = datetime.now()
+        job.done.set()
+
+    def _prune(self):
+        finished = [j for j in self._jobs.values() if j.done.is_set()]
+        finished.sort(key=lambda j: j.finished_at)
+        for job in finished[:max(0, len(finished) - JOB_HISTORY)]:
+            del self._jobs[job.id]
+
+
+class _HandlerMixin:
+    """HTTP front end of a PipelineService (set as the ``service`` attribute of the server).
+
+    Mixed into BaseHTTPRequestHandler by serve(); http.server is only
+    imported there, keeping it out of the CLI's start-up.
+    """
+
+    server_version = 'ParquetPipelines'
+
+    @property
+    def service(self) -> PipelineService:
+        return self.server.service
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split('/') if p]
+        if parts == ['health']:
+            return self._reply(HTTPStatus.OK, self.service.health())
+        if parts == ['status']:
+            runs = int(parse_qs(url.query).get('runs', ['10'])[0])
+            return self._reply(HTTPStatus.OK, self.service.pp.get_run_history(limit=runs))
+        if parts == ['jobs']:
+            return self._reply(HTTPStatus.OK, {'jobs': [j.as_dict() for j in self.service.jobs()]})
+        if len(parts) == 2 and parts[0] == 'jobs':
+            job = self.service.get(parts[1])
+            if job is None:
+                return self._reply(HTTPStatus.NOT_FOUND, {'error': f"No job {parts[1]}"})
+            wait = parse_qs(url.query).get('wait')
+            if wait:
+                job.done.wait(min(float(wait[0]), MAX_WAIT_SECONDS))
+            return self._reply(HTTPStatus.OK, job.as_dict())
+        self._reply(HTTPStatus.NOT_FOUND, {'error': f"Unknown endpoint {url.path}"})
+
+    def do_POST(self):
+        path = urlparse(self.path).path.rstrip('/')
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError as e:
+            return self._reply(HTTPStatus.BAD_REQUEST, {'error': f"Invalid JSON body: {e}"})
+
+        try:
+            if path == '/jobs':
+                job = self.service.submit(body.get('command'), body.get('options'))
+                return self._reply(HTTPStatus.ACCEPTED, job.as_dict())
+            if path == '/query':
+                result = self.service.pp.run_query(body['sql'], limit=body.get('limit', DEFAULT_QUERY_LIMIT),
+                                                   cache=True)
+                return self._reply(HTTPStatus.OK, result)
+            if path == '/export':
+                rows = self.service.pp.export_query(body['sql'], body['path'], body.get('format'))
+                return self._reply(HTTPStatus.OK, {'path': body['path'], 'rows': rows})
+            if path == '/shutdown':
+                self._reply(HTTPStatus.ACCEPTED, {'status': 'stopping'})
+                # shutdown() waits for serve_forever, which is waiting for this handler
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+        except (KeyError, ValueError) as e:
+            return self._reply(HTTPStatus.BAD_REQUEST, {'error': str(e)})
+        except Exception as e:
+            return self._reply(HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(e)})
+        self._reply(HTTPStatus.NOT_FOUND, {'error': f"Unknown endpoint {path}"})
+
+    def _reply(self, status: HTTPStatus, payload: Dict):
+        body = json.dumps(payload, default=str).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+def serve(pp, runner: Callable[[Any, str, Dict], Any], host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+    """Run the service in the foreground until interrupted or asked to shut down."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    if host not in ('127.0.0.1', 'localhost', '::1'):
+        logger.warning(f"Serving on {host}: the API has no authentication, so anyone who can reach it can run jobs")
+    service = PipelineService(pp, runner)
+    service.start()
+    handler = type('_Handler', (_HandlerMixin, BaseHTTPRequestHandler), {})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.service = service
+    logger.info(f"Serving {pp.base_dir} on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+        logger.info("Service stopped")
+
+
+class ServiceClient:
+    """Talks to a running service; used by the CLI when a server URL is given."""
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def health(self) -> Dict:
+        return self._request('GET', '/health')
+
+    def submit(self, command: str, options: Dict) -> Dict:
+        return self._request('POST', '/jobs', {'command': command, 'options': options})
+
+    def wait(self, job_id: str, poll_seconds: float = 30.0) -> Dict:
+        """Block until the job has finished and return it."""
+        while True:
+            job = self._request('GET', f"/jobs/{job_id}?wait={poll_seconds}", timeout=poll_seconds + self.timeout)
+            if job['status'] not in ('queued', 'running'):
+                return job
+
+    def run(self, command: str, options: Dict) -> Dict:
+        """Submit a job and wait for its outcome."""
+        job = self.submit(command, options)
+        logger.info(f"Submitted job {job['id']} to {self.url}")
+        return self.wait(job['id'])
+
+    def query(self, sql: str, limit: Optional[int] = DEFAULT_QUERY_LIMIT) -> Dict:
+        return self._request('POST', '/query', {'sql': sql, 'limit': limit})
+
+    def export(self, sql: str, path: str, file_format: Optional[str] = None) -> Dict:
+        """Have the service write a query's result to ``path`` (on the machine it runs on)."""
+        return self._request('POST', '/export', {'sql': sql, 'path': path, 'format': file_format})
+
+    def status(self, runs: int = 10) -> Dict:
+        return self._request('GET', f"/status?runs={int(runs)}")
+
+    def shutdown(self) -> Dict:
+        return self._request('POST', '/shutdown')
+
+    def _request(self, method: str, path: str, payload: Optional[Dict] = None,
+                 timeout: Optional[float] = None) -> Dict:
+        import urllib.error
+        import urllib.request
+
+        data = json.dumps(payload).encode() if payload is not None else None
+        request = urllib.request.Request(self.url + path, data=data, method=method,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout or self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get('error', e.reason)
+            except ValueError:
+                message = e.reason
+            raise RuntimeError(f"Service error ({e.code}): {message}") from None
+        except urllib.error.URLError as e:
+            raise ConnectionError(f"Cannot reach the service at {self.url}: {e.reason}") from None
@@ -0,0 +1,245 @@
+"""
+Statements of a multi-statement model file and the order they must run in.
+
+A model file may hold several statements, e.g. a set of ``CREATE TABLE``
+statements that each build a helper table. They are split here (respecting
+quotes, dollar-quoted strings and comments), each statement's target table is
+read from it, and a statement is made to wait for every earlier statement it
+reads from or writes the same table as, or that reads the table it writes.
+Statements with no such relation can run concurrently.
+
+Leading ``-- threads: N`` and ``-- memory_limit: 2GB`` comments reserve
+resources for a statement (the model header's values apply to every
+statement that doesn't set its own); see ResourceBudget.
+"""
+
+import re
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set
+
+# Per-statement resource hints read from a statement's leading comments
+RESOURCE_HINTS = ('threads', 'memory_limit')
+
+_TARGET_PATTERN = re.compile(
+    r"""^\s*(?:
+        CREATE\s+(?:OR\s+REPLACE\s+)?(?P<temp>TEMP(?:ORARY)?\s+)?(?:TABLE|VIEW)\s+(?:IF\s+NOT\s+EXISTS\s+)?
+      | INSERT\s+(?:OR\s+\w+\s+)?INTO\s+
+      | MERGE\s+INTO\s+
+      | DELETE\s+FROM\s+
+      | UPDATE\s+
+      | DROP\s+(?:TABLE|VIEW)\s+(?:IF\s+EXISTS\s+)?
+      | ALTER\s+TABLE\s+
+      | COMMENT\s+ON\s+(?:TABLE|VIEW)\s+
+    )(?P<name>[\w."]+)""",
+    re.IGNORECASE | re.VERBOSE
+)
+
+_SIZE_UNITS = {
+    '': 1, 'b': 1,
+    'kb': 10 ** 3, 'mb': 10 ** 6, 'gb': 10 ** 9, 'tb': 10 ** 12,
+    'kib': 2 ** 10, 'mib': 2 ** 20, 'gib': 2 ** 30, 'tib': 2 ** 40,
+}
+
+
+class Statement:
+    """One statement of a model file: its SQL, the table it writes and its resource hints."""
+
+    def __init__(self, sql: str, index: int, hints: Optional[Dict[str, str]] = None):
+        self.sql = sql
+        self.index = index
+        self.hints = hints or {}
+        body = strip_comments_and_strings(sql)
+        match = _TARGET_PATTERN.match(body)
+        self.target: Optional[str] = _normalize_name(match.group('name')) if match else None
+        self.temporary = bool(match and match.group('temp'))
+        self._words = set(re.findall(r'\w+', body.lower()))
+
+    def reads(self, table: str) -> bool:
+        """True if the statement may mention ``table`` (matched on its unqualified name)."""
+        return table.split('.')[-1] in self._words
+
+    def __repr__(self):
+        return f"Statement({self.index}, {self.target})"
+
+
+def split_statements(sql: str) -> List[str]:
+    """Split SQL text on semicolons outside quotes and comments.
+
+    Each statement keeps its leading comments; chunks holding nothing but
+    comments and whitespace are dropped.
+    """
+    statements = []
+    start = i = 0
+    n = len(sql)
+    while i < n:
+        char = sql[i]
+        if char in ("'", '"'):
+            i = _skip_quoted(sql, i, char)
+        elif sql.startswith('--', i):
+            end = sql.find('\n', i)
+            i = n if end == -1 else end + 1
+        elif sql.startswith('/*', i):
+            end = sql.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+        elif char == '$':
+            tag = re.match(r'\$(?:[A-Za-z_]\w*)?\$', sql[i:])
+            if tag:
+                end = sql.find(tag.group(0), i + len(tag.group(0)))
+                i = n if end == -1 else end + len(tag.group(0))
+            else:
+                i += 1
+        elif char == ';':
+            statements.append(sql[start:i + 1])
+            start = i = i + 1
+        else:
+            i += 1
+    statements.append(sql[start:])
+    return [s.strip() for s in statements if strip_comments_and_strings(s).strip(' \t\r\n;')]
+
+
+def strip_comments_and_strings(sql: str) -> str:
+    """Blank out comments and string literals so keywords and names can be matched safely."""
+    return re.sub(
+        r"--[^\n]*|/\*.*?\*/|'(?:[^']|'')*'|\$(?P<tag>(?:[A-Za-z_]\w*)?)\$.*?\$(?P=tag)\$",
+        ' ', sql, flags=re.DOTALL
+    )
+
+
+def leading_hints(sql: str) -> Dict[str, str]:
+    """Resource hints (``-- threads: 4``) among the comment lines a statement starts with."""
+    hints = {}
+    for line in sql.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        if not line.startswith('--'):
+            break
+        key, sep, value = line[2:].partition(':')
+        if sep and key.strip() in RESOURCE_HINTS and value.strip():
+            hints[key.strip()] = value.strip()
+    return hints
+
+
+def parse_statements(sql: str, defaults: Optional[Dict[str, str]] = None) -> List[Statement]:
+    """Split a model file into Statements; ``defaults`` are hints for statements without their own."""
+    defaults = {k: v for k, v in (defaults or {}).items() if k in RESOURCE_HINTS}
+    return [Statement(text, index, {**defaults, **leading_hints(text)})
+            for index, text in enumerate(split_statements(sql))]
+
+
+def statement_dependencies(statements: List[Statement]) -> Optional[Dict[int, Set[int]]]:
+    """Map each statement's index to the indexes of earlier statements it must wait for.
+
+    Returns None when the statements must run in file order on one connection:
+    some statement has no recognisable target (SET, PRAGMA, a bare SELECT)
+    or creates a temporary table, which other connections can't see.
+    """
+    if any(s.target is None or s.temporary for s in statements):
+        return None
+    dependencies = {}
+    for later in statements:
+        dependencies[later.index] = {
+            earlier.index for earlier in statements[:later.index]
+            if earlier.target == later.target or later.reads(earlier.target) or earlier.reads(later.target)
+        }
+    return dependencies
+
+
+def is_serial(dependencies: Optional[Dict[int, Set[int]]]) -> bool:
+    """True if no two statements can run at the same time (each waits for the one before it)."""
+    return dependencies is None or all(i - 1 in deps for i, deps in dependencies.items() if i > 0)
+
+
+def parse_size(value: str) -> int:
+    """Bytes in a DuckDB-style size such as ``512MB``, ``2 GiB`` or ``1.5GB``."""
+    match = re.fullmatch(r'\s*([\d.]+)\s*([A-Za-z]*)\s*', str(value))
+    unit = match.group(2).lower() if match else None
+    if unit not in _SIZE_UNITS:
+        raise ValueError(f"Invalid size: {value!r}")
+    return int(float(match.group(1)) * _SIZE_UNITS[unit])
+
+
+class ResourceBudget:
+    """Threads and memory of the DuckDB instance that statements reserve before running.
+
+    ``threads`` and ``memory_limit`` are instance-wide settings in DuckDB, so a
+    statement can't be given its own; instead a statement with hints waits
+    until the threads and memory it asks for are not reserved by others.
+    Requests are capped at the totals, so a statement always starts once the
+    others holding reservations finish. Statements without hints reserve
+    nothing but still count as running, which ``exclusive`` waits for.
+    """
+
+    def __init__(self, threads: int, memory_bytes: int):
+        self.threads = threads
+        self.memory_bytes = memory_bytes
+        self._threads_used = 0
+        self._memory_used = 0
+        self._holders = 0
+        self._exclusive = False
+        self._exclusive_waiting = 0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def reserve(self, threads: int = 0, memory_bytes: int = 0) -> Iterator[None]:
+        """Hold ``threads`` and ``memory_bytes`` for the enclosed block."""
+        threads = min(threads, self.threads)
+        memory_bytes = min(memory_bytes, self.memory_bytes)
+
+        def fits() -> bool:
+            if self._exclusive or self._exclusive_waiting:
+                return False
+            return (self._threads_used + threads <= self.threads
+                    and self._memory_used + memory_bytes <= self.memory_bytes)
+
+        with self._condition:
+            self._condition.wait_for(fits)
+            self._threads_used += threads
+            self._memory_used += memory_bytes
+            self._holders += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._threads_used -= threads
+                self._memory_used -= memory_bytes
+                self._holders -= 1
+                self._condition.notify_all()
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        """Run the enclosed block with nothing else holding a reservation.
+
+        Waits for running holders to finish while holding back new ones.
+        """
+        with self._condition:
+            self._exclusive_waiting += 1
+            self._condition.wait_for(lambda: not self._exclusive and self._holders == 0)
+            self._exclusive_waiting -= 1
+            self._exclusive = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._exclusive = False
+                self._condition.notify_all()
+
+
+def _skip_quoted(sql: str, start: int, quote: str) -> int:
+    """Index just past the quoted string or identifier opening at ``start`` (doubled quotes escape)."""
+    i = start + 1
+    while i < len(sql):
+        if sql[i] == quote:
+            if sql.startswith(quote * 2, i):
+                i += 2
+                continue
+            return i + 1
+        i += 1
+    return len(sql)
+
+
+def _normalize_name(name: str) -> str:
+    """Lower-case a possibly quoted, dotted table name and drop the catalog part."""
+    parts = [p.strip('"').lower() for p in name.split('.') if p]
+    return '.'.join(parts[-2:])
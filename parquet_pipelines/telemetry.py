@@ -0,0 +1,173 @@
+"""
+Run telemetry: per-step timings and resource use for extracts and model builds.
+
+A RunRecorder collects one StepRecord per extract or model of a command: wall
+and CPU time, peak RSS, rows in/out, bytes written, resource settings and,
+when profiling is on, DuckDB's query profile. The framework persists finished
+runs to the _runs and _run_steps tables in the DuckLake catalog and can write
+them out as JSON.
+"""
+
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+# How often the background sampler reads the process RSS
+RSS_SAMPLE_INTERVAL = 0.05
+
+
+def rss_bytes() -> int:
+    """Return the current resident set size of this process in bytes (0 if unknown)."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+class StepRecord:
+    """Measurements for one step (an extract or a model build) of a run."""
+
+    def __init__(self, kind: str, name: str):
+        self.kind = kind
+        self.name = name
+        self.status: Optional[str] = None
+        self.started_at = datetime.now()
+        self.seconds: Optional[float] = None
+        self.cpu_seconds: Optional[float] = None
+        # RSS is per process, so concurrent steps see each other's memory
+        self.peak_rss_bytes = 0
+        self.rows_in: Optional[int] = None
+        self.rows_out: Optional[int] = None
+        self.bytes_written: Optional[int] = None
+        self.error: Optional[str] = None
+        # JSON query profile from DuckDB, when the run is profiled
+        self.profile: Optional[str] = None
+        # Resource headers of a model (threads/memory_limit reserved, settings applied)
+        self.resources: Optional[Dict[str, str]] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'kind': self.kind,
+            'name': self.name,
+            'status': self.status,
+            'started_at': self.started_at.isoformat(),
+            'seconds': self.seconds,
+            'cpu_seconds': self.cpu_seconds,
+            'peak_rss_bytes': self.peak_rss_bytes,
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'bytes_written': self.bytes_written,
+            'error': self.error,
+            'profile': self.profile,
+            'resources': self.resources,
+        }
+
+
+class RunRecorder:
+    """Collects the steps of one CLI command (an extract or pipeline run).
+
+    Steps may run on several threads at once. CPU time is the process's CPU
+    time over the step, which includes DuckDB's worker threads but overlaps
+    when steps run concurrently.
+    """
+
+    def __init__(self, command: str, target: Optional[str] = None, profile: bool = False):
+        self.run_id = uuid.uuid4().hex
+        self.command = command
+        self.target = target
+        self.profile = profile
+        self.status: Optional[str] = None
+        self.started_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+        self.seconds: Optional[float] = None
+        self.cpu_seconds: Optional[float] = None
+        self.peak_rss_bytes = rss_bytes()
+        self.steps: List[StepRecord] = []
+        # DuckDB resource settings (memory_limit, threads, ...) the run applied
+        self.resources: Dict[str, str] = {}
+        # The earlier run this one resumed, if any
+        self.resumed_from: Optional[str] = None
+
+        self._start = time.perf_counter()
+        self._start_cpu = time.process_time()
+        self._active: List[StepRecord] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stopped = threading.Event()
+        self._sampler = threading.Thread(target=self._sample_rss, name='rss-sampler', daemon=True)
+        self._sampler.start()
+
+    @contextmanager
+    def step(self, kind: str, name: str) -> Iterator[StepRecord]:
+        """Measure the enclosed block as one step; exceptions mark it failed and propagate."""
+        record = StepRecord(kind, name)
+        record.peak_rss_bytes = rss_bytes()
+        with self._lock:
+            self.steps.append(record)
+            self._active.append(record)
+        # A step nested in another (a model's statements) hands the thread back to it when done
+        outer = self.current_step()
+        self._local.step = record
+        start, start_cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        except Exception as e:
+            record.status = 'failed'
+            record.error = str(e)
+            raise
+        finally:
+            record.seconds = round(time.perf_counter() - start, 3)
+            record.cpu_seconds = round(time.process_time() - start_cpu, 3)
+            record.peak_rss_bytes = max(record.peak_rss_bytes, rss_bytes())
+            self._local.step = outer
+            with self._lock:
+                self._active.remove(record)
+
+    def current_step(self) -> Optional[StepRecord]:
+        """The step running on the calling thread, if any."""
+        return getattr(self._local, 'step', None)
+
+    def finish(self, failed: bool = False):
+        """Stop sampling and settle the run's totals and status."""
+        self._stopped.set()
+        self._sampler.join()
+        self.finished_at = datetime.now()
+        self.seconds = round(time.perf_counter() - self._start, 3)
+        self.cpu_seconds = round(time.process_time() - self._start_cpu, 3)
+        self.peak_rss_bytes = max([self.peak_rss_bytes] + [s.peak_rss_bytes for s in self.steps])
+        failed = failed or any(s.status == 'failed' for s in self.steps)
+        self.status = 'failed' if failed else 'succeeded'
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'run_id': self.run_id,
+            'command': self.command,
+            'target': self.target,
+            'status': self.status,
+            'started_at': self.started_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'seconds': self.seconds,
+            'cpu_seconds': self.cpu_seconds,
+            'peak_rss_bytes': self.peak_rss_bytes,
+            'resources': self.resources,
+            'resumed_from': self.resumed_from,
+            'steps': [s.as_dict() for s in self.steps],
+        }
+
+    def _sample_rss(self):
+        while not self._stopped.wait(RSS_SAMPLE_INTERVAL):
+            rss = rss_bytes()
+            with self._lock:
+                self.peak_rss_bytes = max(self.peak_rss_bytes, rss)
+                for record in self._active:
+                    record.peak_rss_bytes = max(record.peak_rss_bytes, rss)
@@ -0,0 +1,73 @@
+"""
+Column types for bronze tables: declared source types and downcast integers.
+
+Extracts that go through pandas lose the source's types (nullable integers
+become DOUBLE, decimals become DOUBLE or get an inferred scale), so the
+declared types are cast back when the staged rows are loaded. With
+``downcast_integers`` the integer columns of a bronze table are stored in
+the smallest integer type their values fit, and widened in place when an
+increment no longer fits.
+
+Low-cardinality strings stay VARCHAR: DuckLake has no ENUM type, and the
+Parquet files it writes already dictionary-encode them.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from parquet_pipelines.native_source import quote_identifier
+
+# Integer types from narrowest to widest, with the values they hold
+INTEGER_RANGES: List[Tuple[str, int, int]] = [
+    ('TINYINT', -2 ** 7, 2 ** 7 - 1),
+    ('SMALLINT', -2 ** 15, 2 ** 15 - 1),
+    ('INTEGER', -2 ** 31, 2 ** 31 - 1),
+    ('BIGINT', -2 ** 63, 2 ** 63 - 1),
+]
+INTEGER_TYPES = [name for name, _, _ in INTEGER_RANGES]
+
+# Integer column types that may be stored narrower
+DOWNCAST_TYPES = ('SMALLINT', 'INTEGER', 'BIGINT', 'HUGEINT')
+
+
+def smallest_integer(low: Optional[int], high: Optional[int]) -> Optional[str]:
+    """The narrowest integer type holding ``low`` to ``high``, or None if BIGINT can't (or no values)."""
+    if low is None or high is None:
+        return None
+    for name, minimum, maximum in INTEGER_RANGES:
+        if minimum <= low and high <= maximum:
+            return name
+    return None
+
+
+def is_numeric(type_name: str) -> bool:
+    """True for DuckDB integer, floating point and decimal types."""
+    return (type_name.lstrip('U') in INTEGER_TYPES or type_name in ('HUGEINT', 'UHUGEINT', 'FLOAT', 'DOUBLE')
+            or type_name.startswith('DECIMAL'))
+
+
+def is_wider(type_name: str, than: str) -> bool:
+    """True if integer type ``type_name`` holds more values than ``than``."""
+    return INTEGER_TYPES.index(type_name) > INTEGER_TYPES.index(than)
+
+
+def cast_relation(relation: str, casts: Dict[str, str]) -> str:
+    """``relation`` with the given columns cast to new types (and the rest as they are)."""
+    if not casts:
+        return relation
+    replaced = ', '.join(f"CAST({quote_identifier(c)} AS {t}) AS {quote_identifier(c)}" for c, t in casts.items())
+    return f"(SELECT * REPLACE ({replaced}) FROM {relation})"
+
+
+def range_query(relation: str, columns: List[str]) -> str:
+    """One query returning MIN and MAX of each column, in pairs."""
+    ranges = ', '.join(f"MIN({quote_identifier(c)}), MAX({quote_identifier(c)})" for c in columns)
+    return f"SELECT {ranges} FROM {relation}"
+
+
+def uncastable_query(relation: str, casts: Dict[str, str]) -> str:
+    """One query counting, per cast, the non-NULL values that would not survive it."""
+    counts = ', '.join(
+        f"COUNT(*) FILTER (WHERE {quote_identifier(c)} IS NOT NULL AND TRY_CAST({quote_identifier(c)} AS {t}) IS NULL)"
+        for c, t in casts.items()
+    )
+    return f"SELECT {counts} FROM {relation}"
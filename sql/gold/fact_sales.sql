@@ -1,7 +1,7 @@
 -- name: fact_sales
 -- layer: gold
 -- description: Sales fact table with all business metrics
--- depends_on: silver.order_items, silver.orders_cleaned, gold.dim_customers
+-- depends_on: bronze.order_items, silver.orders_cleaned, gold.dim_customers
 
 CREATE OR REPLACE TABLE gold.fact_sales AS
 SELECT 
@@ -41,6 +41,8 @@ SELECT
     o.status AS order_status,
     o.payment_method
 
+-- Order lines are read straight from bronze, as there is no silver order_items
+-- model; the WHERE clause drops lines without a quantity or price
 FROM bronze.order_items oi
 INNER JOIN silver.orders_cleaned o ON oi.order_id = o.order_id
 LEFT JOIN gold.dim_customers c ON o.customer_id = c.customer_id
@@ -0,0 +1,72 @@
+"""
+Shared fixtures: a small copy of the synthetic retail database and a project that extracts it.
+"""
+
+import shutil
+from pathlib import Path
+
+import pytest
+import yaml
+
+from parquet_pipelines.benchmarks.retail import RETAIL_DDL, create_retail_sqlite
+from parquet_pipelines.cli import ParquetPipelines
+
+# Small enough that a full extract and model run take a second or two
+RETAIL_CUSTOMERS = 200
+
+
+@pytest.fixture(scope='session')
+def retail_template(tmp_path_factory) -> Path:
+    """The retail database, generated once per session (copy it before changing it)."""
+    path = tmp_path_factory.mktemp('retail') / 'retail.db'
+    create_retail_sqlite(path, RETAIL_CUSTOMERS)
+    return path
+
+
+@pytest.fixture
+def retail_db(tmp_path, retail_template) -> Path:
+    """This test's own copy of the retail database."""
+    path = tmp_path / 'retail.db'
+    shutil.copy(retail_template, path)
+    return path
+
+
+def write_source_config(project: Path, database: Path, tables=None, **options):
+    """Write config/source_tables.yml extracting ``tables`` (default: all retail tables) from ``database``."""
+    tables = tables or [{'name': table, 'schema': 'main'} for table in RETAIL_DDL]
+    config = {'connection': {'type': 'sqlite', 'database': str(database)}, **options, 'tables': tables}
+    (project / 'config').mkdir(parents=True, exist_ok=True)
+    with open(project / 'config' / 'source_tables.yml', 'w') as f:
+        yaml.dump(config, f, sort_keys=False)
+
+
+def write_model(project: Path, layer: str, name: str, sql: str) -> Path:
+    """Write sql/<layer>/<name>.sql and return its path."""
+    path = project / 'sql' / layer / f"{name}.sql"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(sql)
+    return path
+
+
+@pytest.fixture
+def project(tmp_path, retail_db) -> Path:
+    """An empty project whose source_tables.yml extracts every table of ``retail_db``."""
+    project = tmp_path / 'project'
+    project.mkdir()
+    write_source_config(project, retail_db)
+    with open(project / 'config' / 'pipeline.yml', 'w') as f:
+        yaml.dump({'name': 'test', 'workers': 2}, f)
+    return project
+
+
+@pytest.fixture
+def pp(project):
+    """A ParquetPipelines on ``project``, cleaned up after the test."""
+    pipelines = ParquetPipelines(base_dir=project)
+    yield pipelines
+    pipelines.cleanup()
+
+
+def rows(pp: ParquetPipelines, sql: str):
+    """All rows of a query on the DuckLake, as tuples."""
+    return pp._get_duck_connection().execute(sql).fetchall()
@@ -0,0 +1,139 @@
+"""
+Graph selectors and --changed-since narrow a run; validation is strict only for what it builds and reads.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from parquet_pipelines.dag import DagValidationError, ModelDag, ModelNode
+from tests.conftest import rows, write_model
+
+
+def node(table: str, *depends_on: str) -> ModelNode:
+    layer, name = table.split('.')
+    return ModelNode(name, layer, Path(f"{name}.sql"), list(depends_on))
+
+
+@pytest.fixture
+def dag() -> ModelDag:
+    return ModelDag([
+        node('silver.orders', 'bronze.orders'),
+        node('gold.sales', 'silver.orders'),
+        node('gold.broken', 'silver.missing'),
+        node('gold.loop_a', 'gold.loop_b'),
+        node('gold.loop_b', 'gold.loop_a'),
+    ])
+
+
+def test_whole_graph_problems_raise(dag):
+    with pytest.raises(DagValidationError) as error:
+        dag.validate()
+    assert any('silver.missing' in p for p in error.value.problems)
+    assert any('cycle' in p for p in error.value.problems)
+
+
+def test_problems_outside_the_selection_only_warn(dag):
+    warnings = dag.validate({'bronze.orders'}, ['gold.sales'])
+    assert any('silver.missing' in w for w in warnings)
+    assert any('cycle' in w for w in warnings)
+
+
+def test_problems_upstream_of_the_selection_raise(dag):
+    with pytest.raises(DagValidationError, match='silver.missing'):
+        dag.validate(tables=['gold.broken'])
+    with pytest.raises(DagValidationError, match='cycle'):
+        dag.validate(tables=['gold.loop_a'])
+
+
+def test_pipeline_runs_its_steps_despite_a_broken_model(pp, project):
+    conn = pp._get_duck_connection()
+    conn.execute("CREATE TABLE bronze.numbers AS SELECT range AS n FROM range(3)")
+    write_model(project, 'silver', 'numbers', """-- name: numbers
+-- layer: silver
+-- depends_on: bronze.numbers
+CREATE OR REPLACE TABLE silver.numbers AS SELECT n * 2 AS n FROM bronze.numbers;
+""")
+    write_model(project, 'gold', 'broken', """-- name: broken
+-- layer: gold
+-- depends_on: silver.missing
+CREATE OR REPLACE TABLE gold.broken AS SELECT * FROM silver.missing;
+""")
+
+    results = pp.run_pipeline({'name': 'numbers', 'steps': ['sql/silver/numbers.sql']})
+
+    assert [(r['table'], r['status']) for r in results] == [('silver.numbers', 'built')]
+    assert rows(pp, "SELECT sum(n) FROM silver.numbers") == [(6,)]
+    with pytest.raises(DagValidationError, match='silver.missing'):
+        pp.run_pipeline({'name': 'all'})
+
+
+@pytest.mark.parametrize('selectors, expected', [
+    (['gold.sales'], ['gold.sales']),
+    (['+sales'], ['silver.orders', 'gold.sales']),
+    (['silver.orders+'], ['silver.orders', 'gold.sales']),
+    (['bronze.orders+'], ['silver.orders', 'gold.sales']),
+    (['gold.loop_*'], ['gold.loop_a', 'gold.loop_b']),
+    (['silver.orders, gold.broken'], ['silver.orders', 'gold.broken']),
+])
+def test_selectors(dag, selectors, expected):
+    assert sorted(dag.select(selectors)) == sorted(expected)
+
+
+def test_selector_matching_nothing_raises(dag):
+    with pytest.raises(ValueError, match='nowhere'):
+        dag.select(['nowhere+'])
+
+
+CUSTOMER_MODELS = {
+    ('silver', 'orders_clean'): """-- name: orders_clean
+-- layer: silver
+-- depends_on: bronze.orders
+CREATE OR REPLACE TABLE silver.orders_clean AS SELECT order_id, customer_id FROM bronze.orders;
+""",
+    ('silver', 'customers_clean'): """-- name: customers_clean
+-- layer: silver
+-- depends_on: bronze.customers
+CREATE OR REPLACE TABLE silver.customers_clean AS SELECT customer_id, first_name FROM bronze.customers;
+""",
+    ('gold', 'customer_orders'): """-- name: customer_orders
+-- layer: gold
+-- depends_on: silver.orders_clean, silver.customers_clean
+CREATE OR REPLACE TABLE gold.customer_orders AS
+SELECT c.first_name, count(*) AS orders
+FROM silver.customers_clean c JOIN silver.orders_clean o USING (customer_id)
+GROUP BY ALL;
+""",
+}
+
+
+@pytest.fixture
+def customer_models(pp, project, retail_db):
+    source = {'connection': {'type': 'sqlite', 'database': str(retail_db)}}
+    pp.extract_tables(source, [{'name': t, 'schema': 'main'} for t in ('orders', 'customers')], force=True)
+    for (layer, name), sql in CUSTOMER_MODELS.items():
+        write_model(project, layer, name, sql)
+    return source
+
+
+def built(results):
+    return [r['table'] for r in results if r['status'] == 'built']
+
+
+def test_pipeline_builds_only_the_selection(pp, customer_models):
+    results = pp.run_pipeline({'name': 'test'}, select=['+customers_clean'])
+    assert built(results) == ['silver.customers_clean']
+
+    results = pp.run_pipeline({'name': 'test'}, select=['silver.*'], force=True)
+    assert sorted(built(results)) == ['silver.customers_clean', 'silver.orders_clean']
+
+
+def test_pipeline_builds_what_changed_since_a_snapshot(pp, customer_models):
+    pp.run_pipeline({'name': 'test'})
+    since = pp._current_snapshot_id(pp._get_duck_connection())
+    assert pp.run_pipeline({'name': 'test'}, changed_since=str(since)) == []
+
+    pp.extract_table(customer_models, {'name': 'customers', 'schema': 'main'}, force=True)
+    results = pp.run_pipeline({'name': 'test'}, changed_since=str(since), force=True)
+
+    assert built(results) == ['silver.customers_clean', 'gold.customer_orders']
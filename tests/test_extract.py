@@ -0,0 +1,91 @@
+"""
+Every extract backend loads the same rows with the same column types into bronze.
+"""
+
+import pytest
+import yaml
+
+from parquet_pipelines.benchmarks.retail import RETAIL_DDL, retail_row_counts
+from tests.conftest import RETAIL_CUSTOMERS, rows
+
+BACKENDS = {
+    'arrow': {'backend': 'arrow'},
+    'pandas': {'backend': 'pandas'},
+    'pandas in memory': {'backend': 'pandas', 'streaming': False},
+    'duckdb': {'backend': 'duckdb'},
+}
+
+# Split on a key, a date and a timestamp column
+SPLITS = {
+    'order_items': {'column': 'order_item_id', 'partitions': 4},
+    'customers': {'column': 'date_of_birth', 'partitions': 3},
+    'orders': {'column': 'order_date', 'partitions': 3},
+}
+
+
+def extract(pp, retail_db, table: str, **options):
+    """Extract one retail table with the given options; returns its stats, column types and rows."""
+    source = {'connection': {'type': 'sqlite', 'database': str(retail_db)}}
+    stats = pp.extract_table(source, {'name': table, 'schema': 'main', **options}, force=True)
+    types = rows(pp, f"""
+        SELECT column_name, data_type FROM duckdb_columns()
+        WHERE database_name = 'parquet_pipelines' AND schema_name = 'bronze' AND table_name = '{table}'
+        ORDER BY column_index
+    """)
+    return stats, types, rows(pp, f"SELECT * FROM bronze.{table} ORDER BY ALL")
+
+
+@pytest.mark.parametrize('table', list(RETAIL_DDL))
+def test_backends_load_identical_tables(pp, retail_db, table):
+    _, types, expected = extract(pp, retail_db, table, **BACKENDS['arrow'])
+    assert len(expected) == retail_row_counts(RETAIL_CUSTOMERS)[table]
+
+    for name, options in BACKENDS.items():
+        _, backend_types, backend_rows = extract(pp, retail_db, table, **options)
+        assert backend_types == types, name
+        assert backend_rows == expected, name
+
+
+@pytest.mark.parametrize('backend', ['arrow', 'pandas'])
+@pytest.mark.parametrize('table', list(SPLITS))
+def test_split_extract_matches_a_single_query(pp, retail_db, backend, table):
+    _, types, expected = extract(pp, retail_db, table, backend=backend)
+    stats, split_types, split_rows = extract(pp, retail_db, table, backend=backend, split=SPLITS[table])
+
+    assert split_types == types
+    assert split_rows == expected
+    assert stats['partitions'] == SPLITS[table]['partitions']
+
+
+@pytest.mark.parametrize('backend', ['arrow', 'pandas'])
+def test_streamed_extract_reads_in_batches(pp, retail_db, backend):
+    stats, _, loaded = extract(pp, retail_db, 'order_items', backend=backend, batch_size=250)
+
+    assert stats['rows'] == len(loaded) == retail_row_counts(RETAIL_CUSTOMERS)['order_items']
+    assert stats['batches'] == -(-stats['rows'] // 250)
+
+
+def test_a_failing_table_does_not_stop_the_others(pp, retail_db):
+    source = {'connection': {'type': 'sqlite', 'database': str(retail_db)}}
+    tables = [{'name': table, 'schema': 'main'} for table in RETAIL_DDL]
+    tables.insert(1, {'name': 'missing', 'schema': 'main'})
+
+    results = pp.extract_tables(source, tables, workers=3)
+
+    assert [r['status'] for r in results] == ['extracted', 'failed'] + ['extracted'] * (len(tables) - 2)
+    assert 'missing' in results[1]['error']
+    counts = retail_row_counts(RETAIL_CUSTOMERS)
+    for table in RETAIL_DDL:
+        assert rows(pp, f"SELECT count(*) FROM bronze.{table}") == [(counts[table],)]
+
+
+def test_named_pipeline_passes_force_to_extract(pp, project):
+    with open(project / 'config' / 'named_pipelines.yml', 'w') as f:
+        yaml.dump({'load': {'extract': {'tables': ['main.customers']}}}, f)
+    pp.run_named_pipeline('load')
+    loaded = pp.get_freshness(['bronze.customers'])['bronze.customers']
+
+    pp.run_named_pipeline('load')
+    assert pp.get_freshness(['bronze.customers'])['bronze.customers'] == loaded
+    pp.run_named_pipeline('load', force=True)
+    assert pp.get_freshness(['bronze.customers'])['bronze.customers']['refreshed_at'] > loaded['refreshed_at']
@@ -0,0 +1,59 @@
+"""
+A model is rebuilt only when its SQL or an input changed since its last build, or when forced.
+"""
+
+import pytest
+
+from tests.conftest import rows, write_model
+
+SUMMARY = """-- name: order_summary
+-- layer: silver
+-- depends_on: bronze.orders
+CREATE OR REPLACE TABLE silver.order_summary AS
+SELECT status, count(*) AS orders FROM bronze.orders GROUP BY status;
+"""
+
+
+@pytest.fixture
+def orders_source(pp, project, retail_db):
+    source = {'connection': {'type': 'sqlite', 'database': str(retail_db)}}
+    pp.extract_table(source, {'name': 'orders', 'schema': 'main'}, force=True)
+    write_model(project, 'silver', 'order_summary', SUMMARY)
+    return source
+
+
+def statuses(pp, **options):
+    return [(r['table'], r['status']) for r in pp.run_pipeline({'name': 'test'}, **options)]
+
+
+def snapshot(pp):
+    return pp._current_snapshot_id(pp._get_duck_connection())
+
+
+def test_unchanged_model_is_skipped_and_reported(pp, orders_source):
+    assert statuses(pp) == [('silver.order_summary', 'built')]
+    before = snapshot(pp)
+
+    assert statuses(pp) == [('silver.order_summary', 'cached')]
+    assert snapshot(pp) == before
+
+
+def test_changed_sql_rebuilds(pp, project, orders_source):
+    statuses(pp)
+    write_model(project, 'silver', 'order_summary', SUMMARY.replace('count(*)', 'count(order_id)'))
+
+    assert statuses(pp) == [('silver.order_summary', 'built')]
+    assert statuses(pp) == [('silver.order_summary', 'cached')]
+
+
+def test_new_input_version_rebuilds(pp, orders_source):
+    statuses(pp)
+    pp.extract_table(orders_source, {'name': 'orders', 'schema': 'main'}, force=True)
+
+    assert statuses(pp) == [('silver.order_summary', 'built')]
+
+
+def test_force_rebuilds(pp, orders_source):
+    statuses(pp)
+    assert statuses(pp, force=True) == [('silver.order_summary', 'built')]
+    assert rows(pp, "SELECT sum(orders) FROM silver.order_summary") == rows(pp, "SELECT count(*) FROM bronze.orders")
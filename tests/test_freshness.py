@@ -0,0 +1,85 @@
+"""
+The freshness registry records each refresh in the snapshot that writes the table, and skips fresh tables.
+"""
+
+import sqlite3
+
+from parquet_pipelines.benchmarks.retail import RETAIL_DDL
+from tests.conftest import rows, write_model
+
+ORDERS = {'name': 'orders', 'schema': 'main', 'incremental': {'watermark_column': 'order_date'}}
+
+SUMMARY = """-- name: order_summary
+-- layer: silver
+-- depends_on: bronze.orders
+CREATE OR REPLACE TABLE silver.order_summary AS
+SELECT status, count(*) AS orders FROM bronze.orders GROUP BY status;
+"""
+
+
+def source(retail_db, backend='duckdb'):
+    return {'connection': {'type': 'sqlite', 'database': str(retail_db)}, 'backend': backend}
+
+
+def snapshot(pp):
+    return pp._current_snapshot_id(pp._get_duck_connection())
+
+
+def test_extract_records_rows_watermark_and_snapshot(pp, retail_db):
+    assert pp.is_table_stale('bronze', 'orders')
+    before = snapshot(pp)
+    pp.extract_table(source(retail_db), ORDERS, force=True)
+
+    # The data, its watermark and its registry row commit as one snapshot
+    assert snapshot(pp) == before + 1
+    entry = pp.get_freshness(['bronze.orders'])['bronze.orders']
+    assert entry['row_count'] == rows(pp, "SELECT count(*) FROM bronze.orders")[0][0]
+    assert entry['watermark'] == str(rows(pp, "SELECT max(order_date) FROM bronze.orders")[0][0])
+    assert entry['snapshot_id'] == before
+    assert not pp.is_table_stale('bronze', 'orders')
+    assert pp.is_table_stale('bronze', 'orders', max_age_hours=0)
+
+
+def test_empty_increment_commits_nothing(pp, retail_db):
+    pp.extract_table(source(retail_db, 'arrow'), ORDERS, force=True)
+    entry = pp.get_freshness(['bronze.orders'])
+    before = snapshot(pp)
+
+    assert pp.extract_table(source(retail_db, 'arrow'), ORDERS, force=True)['rows'] == 0
+    assert snapshot(pp) == before
+    assert pp.get_freshness(['bronze.orders']) == entry
+
+    conn = sqlite3.connect(retail_db)
+    conn.execute("UPDATE orders SET order_date = '2030-01-01 00:00:00' WHERE order_id = 1")
+    conn.commit()
+    conn.close()
+    pp.extract_table(source(retail_db, 'arrow'), ORDERS, force=True)
+    assert snapshot(pp) == before + 1
+    assert pp.get_freshness(['bronze.orders'])['bronze.orders']['watermark'] == '2030-01-01 00:00:00'
+
+
+def test_model_build_records_freshness_in_its_snapshot(pp, project, retail_db):
+    pp.extract_table(source(retail_db), {'name': 'orders', 'schema': 'main'}, force=True)
+    model = write_model(project, 'silver', 'order_summary', SUMMARY)
+    assert pp.is_table_stale('silver', 'order_summary')
+
+    before = snapshot(pp)
+    pp.execute_sql_transformation(model, 'silver', force=True)
+
+    assert snapshot(pp) == before + 1
+    entry = pp.get_freshness(['silver.order_summary'])['silver.order_summary']
+    assert entry['row_count'] == rows(pp, "SELECT count(*) FROM silver.order_summary")[0][0]
+    assert entry['watermark'] is None
+    assert not pp.is_table_stale('silver', 'order_summary')
+
+
+def test_extract_tables_skips_fresh_tables(pp, retail_db):
+    tables = [{'name': table, 'schema': 'main'} for table in RETAIL_DDL]
+    first = pp.extract_tables(source(retail_db), tables, workers=2)
+    assert {r['status'] for r in first} == {'extracted'}
+    assert set(pp.get_freshness([f"bronze.{t}" for t in RETAIL_DDL])) == {f"bronze.{t}" for t in RETAIL_DDL}
+
+    before = snapshot(pp)
+    assert {r['status'] for r in pp.extract_tables(source(retail_db), tables, workers=2)} == {'skipped'}
+    assert snapshot(pp) == before
+    assert {r['status'] for r in pp.extract_tables(source(retail_db), tables, force=True)} == {'extracted'}
@@ -0,0 +1,38 @@
+"""
+Incremental models pick up rows that share the high-water mark without duplicating any.
+"""
+
+import pytest
+
+from tests.conftest import rows, write_model
+
+MODEL = """-- name: events_inc
+-- layer: silver
+-- materialized: incremental
+-- watermark: ts
+{unique_key}
+SELECT id, ts, payload FROM bronze.events
+WHERE {{{{ incremental_filter }}}};
+"""
+
+
+@pytest.mark.parametrize('unique_key', ['-- unique_key: id', ''], ids=['merge', 'delete-insert'])
+def test_late_rows_at_the_watermark_are_merged_once(pp, project, unique_key):
+    conn = pp._get_duck_connection()
+    conn.execute("CREATE TABLE bronze.events (id INTEGER, ts TIMESTAMP, payload VARCHAR)")
+    conn.execute("""
+        INSERT INTO bronze.events VALUES
+            (1, '2024-01-01 00:00', 'a'), (2, '2024-01-02 00:00', 'b'), (3, '2024-01-02 00:00', 'c')
+    """)
+    model = write_model(project, 'silver', 'events_inc', MODEL.format(unique_key=unique_key))
+
+    pp.execute_sql_transformation(model, 'silver', force=True)
+    # Lands after the build with the same timestamp as the current maximum, plus a newer row
+    conn.execute("INSERT INTO bronze.events VALUES (4, '2024-01-02 00:00', 'd'), (5, '2024-01-03 00:00', 'e')")
+    pp.execute_sql_transformation(model, 'silver', force=True)
+    # Nothing new: building again must not duplicate the rows at the watermark
+    pp.execute_sql_transformation(model, 'silver', force=True)
+
+    assert rows(pp, "SELECT id, payload FROM silver.events_inc ORDER BY id") == [
+        (1, 'a'), (2, 'b'), (3, 'c'), (4, 'd'), (5, 'e')
+    ]
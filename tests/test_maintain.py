@@ -0,0 +1,33 @@
+"""
+Maintenance expires old snapshots and deletes the files only they read; a dry run predicts what goes.
+"""
+
+from tests.conftest import rows
+
+EXPIRE_ALL = {'retention_hours': 0, 'keep_snapshots': 1}
+
+
+def disk_files(pp):
+    return {p: p.stat().st_size for p in pp.ducklake_data_path.rglob('*') if p.is_file()}
+
+
+def test_dry_run_predicts_what_maintenance_deletes(pp, retail_db):
+    source = {'connection': {'type': 'sqlite', 'database': str(retail_db)}}
+    for _ in range(3):
+        pp.extract_table(source, {'name': 'order_items', 'schema': 'main'}, force=True)
+    expected = rows(pp, "SELECT * FROM bronze.order_items ORDER BY ALL")
+    files = disk_files(pp)
+
+    dry = pp.maintain(EXPIRE_ALL, dry_run=True)
+    assert dry['after'] == dry['before']
+    assert disk_files(pp) == files
+    assert dry['snapshots_expired'] == dry['before']['snapshots'] - 1
+    # Only the expired snapshots read the two replaced extracts, so expiring them frees those files
+    assert dry['bytes_reclaimed'] > 0
+
+    report = pp.maintain(EXPIRE_ALL)
+    deleted = set(files) - set(disk_files(pp))
+    assert report['after']['snapshots'] == 1
+    assert len(deleted) == report['old_files_deleted'] == 2
+    assert dry['bytes_reclaimed'] == sum(files[p] for p in deleted)
+    assert rows(pp, "SELECT * FROM bronze.order_items ORDER BY ALL") == expected
@@ -0,0 +1,91 @@
+"""
+Pushdown narrows an extract to the columns and rows the models read, without changing what they build.
+"""
+
+import duckdb
+import pytest
+
+from parquet_pipelines.pushdown import analyse, serialize_with
+from tests.conftest import rows, write_model
+
+ORDER_COLUMNS = ['order_id', 'customer_id', 'order_date', 'ship_date', 'status', 'total_amount', 'notes']
+
+SHIPPED = """-- name: shipped
+-- layer: silver
+-- depends_on: bronze.orders
+CREATE OR REPLACE TABLE silver.shipped AS
+SELECT order_id, customer_id, ship_date FROM bronze.orders WHERE status = 'SHIPPED';
+"""
+
+BIG_ORDERS = """-- name: big_orders
+-- layer: gold
+-- depends_on: bronze.orders
+CREATE OR REPLACE TABLE gold.big_orders AS
+SELECT o.order_id, o.total_amount FROM bronze.orders o WHERE o.total_amount > 500;
+"""
+
+
+@pytest.fixture(scope='module')
+def serialize():
+    return serialize_with(duckdb.connect())
+
+
+def test_columns_and_rows_of_every_reader(serialize):
+    pushdown = analyse('bronze.orders', [SHIPPED, BIG_ORDERS], ORDER_COLUMNS, serialize)
+
+    assert sorted(pushdown.columns) == ['customer_id', 'order_id', 'ship_date', 'status', 'total_amount']
+    conn = duckdb.connect()
+    conn.execute("CREATE TABLE orders (order_id INT, status VARCHAR, total_amount DECIMAL(10,2))")
+    conn.execute("INSERT INTO orders VALUES (1, 'SHIPPED', 10), (2, 'PENDING', 900), (3, 'PENDING', 10)")
+    kept = conn.execute(f"SELECT order_id FROM orders AS src WHERE {pushdown.row_filter} ORDER BY 1").fetchall()
+    assert kept == [(1,), (2,)]
+
+
+@pytest.mark.parametrize('model', [
+    "CREATE TABLE silver.x AS SELECT * FROM bronze.orders WHERE status = 'SHIPPED'",
+    "CREATE TABLE silver.x AS SELECT o.* FROM bronze.orders o",
+])
+def test_star_keeps_every_column(serialize, model):
+    assert analyse('bronze.orders', [model], ORDER_COLUMNS, serialize).columns is None
+
+
+@pytest.mark.parametrize('model', [
+    # One reader without a filter needs every row
+    SHIPPED + "CREATE TABLE silver.y AS SELECT order_id FROM bronze.orders;",
+    # Rows of the null-supplying side of an outer join are kept whatever its WHERE says
+    "CREATE TABLE silver.x AS SELECT c.id, o.order_id FROM bronze.customers c "
+    "LEFT JOIN bronze.orders o ON o.customer_id = c.id WHERE o.status = 'SHIPPED'",
+    # Text comparisons other than equality depend on the source's collation
+    "CREATE TABLE silver.x AS SELECT order_id FROM bronze.orders WHERE status > 'P'",
+    "CREATE TABLE silver.x AS SELECT order_id FROM bronze.orders WHERE status NOT IN ('PENDING')",
+])
+def test_filters_that_cannot_move_keep_every_row(serialize, model):
+    pushdown = analyse('bronze.orders', [model], ORDER_COLUMNS, serialize)
+    assert pushdown.row_filter is None
+
+
+@pytest.mark.parametrize('backend', ['arrow', 'duckdb'])
+def test_extract_reads_only_what_the_models_need(pp, project, retail_db, backend):
+    write_model(project, 'silver', 'shipped', SHIPPED)
+    write_model(project, 'gold', 'big_orders', BIG_ORDERS)
+    source = {'connection': {'type': 'sqlite', 'database': str(retail_db)}, 'backend': backend}
+    orders = {'name': 'orders', 'schema': 'main'}
+
+    def build():
+        pp.run_pipeline({'name': 'test'}, force=True)
+        return (rows(pp, "SELECT * FROM silver.shipped ORDER BY ALL"),
+                rows(pp, "SELECT * FROM gold.big_orders ORDER BY ALL"))
+
+    pp.extract_table(source, orders, force=True)
+    expected = build()
+    needed = rows(pp, "SELECT count(*) FROM bronze.orders WHERE status = 'SHIPPED' OR total_amount > 500")
+    assert needed < rows(pp, "SELECT count(*) FROM bronze.orders")
+
+    pp.extract_table(source, {**orders, 'pushdown': True}, force=True)
+    columns = rows(pp, """
+        SELECT column_name FROM duckdb_columns()
+        WHERE schema_name = 'bronze' AND table_name = 'orders' ORDER BY column_index
+    """)
+    assert [c for (c,) in columns] == ['order_id', 'customer_id', 'ship_date', 'status', 'total_amount']
+    assert rows(pp, "SELECT count(*) FROM bronze.orders") == needed
+    assert build() == expected
@@ -0,0 +1,74 @@
+"""
+The query cache serves a result only while every table the query read is unchanged.
+"""
+
+import duckdb
+import pytest
+
+from parquet_pipelines.pushdown import serialize_with
+from parquet_pipelines.query_cache import read_tables
+from tests.conftest import rows
+
+
+@pytest.fixture
+def lake(pp):
+    conn = pp._get_duck_connection()
+    conn.execute("CREATE TABLE gold.totals AS SELECT 1 AS total")
+    return pp
+
+
+def test_cached_until_a_new_snapshot(lake):
+    query = "SELECT total FROM gold.totals"
+    assert lake.query_ducklake(query) == [(1,)]
+    assert lake.query_ducklake(query) == [(1,)]
+    assert lake.query_cache_stats()['hits'] == 1
+
+    lake._get_duck_connection().execute("UPDATE gold.totals SET total = 2")
+    assert lake.query_ducklake(query) == [(2,)]
+
+
+def test_tables_outside_the_lake_are_never_cached(lake):
+    conn = lake._get_duck_connection()
+    conn.execute("CREATE TABLE memory.main.counter AS SELECT 1 AS n")
+    query = "SELECT n FROM memory.main.counter"
+    assert lake.query_ducklake(query) == [(1,)]
+
+    # Not a DuckLake write, so the snapshot stays the same
+    conn.execute("UPDATE memory.main.counter SET n = 2")
+    assert lake.query_ducklake(query) == [(2,)]
+    assert lake.query_cache_stats()['hits'] == 0
+
+
+@pytest.mark.parametrize('query', [
+    "SELECT n FROM counter",
+    "SELECT n FROM memory.main.counter",
+    "SELECT count(*) FROM main._runs",
+    "SELECT * FROM read_csv('totals.csv')",
+    "SELECT * FROM range(3)",
+    "SELECT total, random() FROM gold.totals",
+    "SELECT total, current_timestamp FROM gold.totals",
+    "SELECT total FROM gold.totals USING SAMPLE 1",
+    "SELECT * FROM gold.missing",
+    "SELECT total FROM gold.totals; SELECT 1",
+])
+def test_uncacheable_queries(lake, query):
+    lake._get_duck_connection().execute("CREATE TEMP TABLE counter AS SELECT 1 AS n")
+    assert not lake._is_cacheable(lake._get_duck_connection(), query)
+
+
+@pytest.mark.parametrize('query', [
+    "SELECT total FROM gold.totals",
+    "SELECT total FROM parquet_pipelines.gold.totals",
+    "WITH t AS (SELECT total FROM gold.totals) SELECT * FROM t",
+    "-- totals\nFROM gold.totals AT (VERSION => 1)",
+    "SELECT 1",
+])
+def test_cacheable_queries(lake, query):
+    assert lake._is_cacheable(lake._get_duck_connection(), query)
+
+
+def test_read_tables_leaves_out_ctes():
+    serialize = serialize_with(duckdb.connect())
+    tree = serialize("WITH o AS (SELECT * FROM silver.orders) SELECT * FROM o JOIN Gold.Dim d USING (id)")
+    assert read_tables(tree) == {('', 'silver', 'orders'), ('', 'gold', 'dim')}
+    assert read_tables(serialize("SELECT * FROM o WHERE id IN (SELECT id FROM read_parquet('x'))")) is None
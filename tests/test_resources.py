@@ -0,0 +1,82 @@
+"""
+Source engines are pooled per source and disposed on cleanup; DuckDB settings are restored after a run.
+"""
+
+import pytest
+
+from parquet_pipelines.benchmarks.retail import RETAIL_DDL
+from parquet_pipelines.cli import RESOURCE_SETTINGS
+from tests.conftest import write_model
+
+SUMMARY = """-- name: order_summary
+-- layer: silver
+-- depends_on: bronze.orders
+{header}
+CREATE OR REPLACE TABLE silver.order_summary AS
+SELECT status, count(*) AS orders FROM bronze.orders GROUP BY status;
+"""
+
+
+def settings(pp):
+    return pp._current_resources(pp._get_duck_connection(), RESOURCE_SETTINGS)
+
+
+def test_one_engine_per_source_disposed_on_cleanup(pp, retail_db, monkeypatch):
+    source = {'connection': {'type': 'sqlite', 'database': str(retail_db)}, 'backend': 'arrow'}
+    results = pp.extract_tables(source, [{'name': t, 'schema': 'main'} for t in RETAIL_DDL], workers=3)
+    assert {r['status'] for r in results} == {'extracted'}
+
+    assert len(pp._engines) == 1
+    engine = next(iter(pp._engines.values()))
+    assert pp._get_engine(dict(source)) is engine
+    assert engine.pool.checkedout() == 0
+
+    disposed = []
+    monkeypatch.setattr(engine, 'dispose', lambda: disposed.append(engine))
+    pp.cleanup()
+    assert disposed == [engine]
+    assert pp._engines == {}
+
+
+def test_settings_are_restored_after_a_pipeline(pp, project, retail_db):
+    source = {'connection': {'type': 'sqlite', 'database': str(retail_db)}}
+    pp.extract_table(source, {'name': 'orders', 'schema': 'main'}, force=True)
+    write_model(project, 'silver', 'order_summary', SUMMARY.format(header='-- preserve_insertion_order: false'))
+    before = settings(pp)
+    resources = {'threads': 2, 'memory_limit': '512MB', 'temp_directory': 'spill'}
+
+    with pp.track_run('run', 'test') as run:
+        pp.run_pipeline({'name': 'test', 'resources': resources})
+
+    assert settings(pp) == before
+    assert run.resources['threads'] == '2'
+    assert run.resources['temp_directory'] == str((project / 'spill').resolve())
+    assert pp._resource_overrides == {}
+
+
+def test_settings_are_restored_when_a_pipeline_fails(pp, project):
+    write_model(project, 'silver', 'broken', """-- name: broken
+-- layer: silver
+CREATE OR REPLACE TABLE silver.broken AS SELECT * FROM bronze.nowhere;
+""")
+    before = settings(pp)
+
+    with pytest.raises(RuntimeError):
+        pp.run_pipeline({'name': 'test', 'resources': {'threads': 1, 'preserve_insertion_order': False}})
+
+    assert settings(pp) == before
+
+
+def test_nested_settings_restore_the_outer_ones(pp):
+    before = settings(pp)
+    with pp._apply_resources({'threads': 3, 'memory_limit': '1GB'}):
+        outer = settings(pp)
+        with pp._apply_resources({'threads': 1}):
+            assert settings(pp)['threads'] == '1'
+        assert settings(pp) == outer
+    assert settings(pp) == before
+
+
+def test_unknown_setting_is_rejected(pp):
+    with pytest.raises(ValueError, match='worker_threads'):
+        pp.run_pipeline({'name': 'test', 'resources': {'worker_threads': 2}})
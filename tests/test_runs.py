@@ -0,0 +1,131 @@
+"""
+Retries of transient failures, and resuming a failed pipeline run.
+"""
+
+import shutil
+import sqlite3
+from pathlib import Path
+
+import duckdb
+import pytest
+
+from parquet_pipelines.cli import _is_transient
+from tests.conftest import write_model
+
+BUNDLED_SQL = Path(__file__).resolve().parents[1] / 'sql'
+
+
+class OperationalError(Exception):
+    """Stands in for a pyodbc error: SQLSTATE first, then the message."""
+
+
+@pytest.mark.parametrize('error, transient', [
+    (sqlite3.OperationalError('database is locked'), True),
+    (sqlite3.OperationalError('no such table: orders'), False),
+    (sqlite3.OperationalError('near "SELEC": syntax error'), False),
+    (duckdb.TransactionException('Failed to commit DuckLake transaction.\nTransaction conflict - attempting to '
+                                 'insert into table with index'), True),
+    (duckdb.CatalogException('Table with name orders does not exist!'), False),
+    (OperationalError('08S01', '[08S01] Communication link failure'), True),
+    (OperationalError('40001', '[40001] Transaction was deadlocked'), True),
+    (OperationalError('HYT00', '[HYT00] Query timeout expired'), True),
+    (OperationalError('28000', '[28000] Login failed for user'), False),
+    (OperationalError('42S02', "[42S02] Invalid object name 'orders'"), False),
+    (ConnectionResetError(), True),
+    (FileNotFoundError(2, 'No such file'), False),
+], ids=repr)
+def test_transient_errors(error, transient):
+    assert _is_transient(error) is transient
+
+
+def test_sqlalchemy_errors_are_classified_by_the_driver_error(retail_db):
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.exc import OperationalError
+
+    with pytest.raises(OperationalError) as error:
+        with create_engine(f"sqlite:///{retail_db}").connect() as conn:
+            conn.execute(text("SELECT * FROM no_such_table"))
+    assert not _is_transient(error.value)
+
+
+def test_retries_stop_at_the_first_permanent_error(pp):
+    calls = []
+
+    def action():
+        calls.append(1)
+        raise sqlite3.OperationalError('no such table: orders' if len(calls) > 1 else 'database is locked')
+
+    with pytest.raises(sqlite3.OperationalError, match='no such table'):
+        pp._retrying(action, 'test', {'retries': 5, 'backoff_seconds': 0})
+    assert len(calls) == 2
+
+
+def test_transient_errors_are_retried_as_configured(pp):
+    calls = []
+
+    def action():
+        calls.append(1)
+        raise sqlite3.OperationalError('database is locked')
+
+    with pytest.raises(sqlite3.OperationalError):
+        pp._retrying(action, 'test', {'retries': 2, 'backoff_seconds': 0})
+    assert len(calls) == 3
+
+
+def write_parallel_model(project):
+    return write_model(project, 'silver', 'numbers', """-- name: numbers
+-- layer: silver
+CREATE OR REPLACE TABLE silver.numbers AS SELECT 1 AS n;
+CREATE OR REPLACE TABLE silver.letters AS SELECT 'a' AS c;
+""")
+
+
+def conflict(*args):
+    raise duckdb.TransactionException('Failed to commit DuckLake transaction.\nTransaction conflict')
+
+
+def test_parallel_statements_are_retried_one_by_one(pp, project, monkeypatch):
+    model = write_parallel_model(project)
+    calls = []
+    monkeypatch.setattr(pp, '_capture_profile', lambda conn: calls.append(1) or conflict())
+
+    with pytest.raises(RuntimeError, match='2 of 2 statements'):
+        pp.execute_sql_transformation(model, 'silver', retry={'retries': 2, 'backoff_seconds': 0})
+    # Three attempts each, and the model isn't retried around them
+    assert len(calls) == 6
+
+
+def test_committed_statements_are_not_rerun_when_the_model_transaction_is_retried(pp, project, monkeypatch):
+    model = write_parallel_model(project)
+    runs, commits = [], []
+    run_statements = pp._run_statements
+    monkeypatch.setattr(pp, '_run_statements',
+                        lambda *args, **kwargs: runs.append(1) or run_statements(*args, **kwargs))
+    monkeypatch.setattr(pp, '_record_table_version', lambda *args: commits.append(1) or conflict())
+
+    with pytest.raises(duckdb.TransactionException):
+        pp.execute_sql_transformation(model, 'silver', retry={'retries': 2, 'backoff_seconds': 0})
+    assert (len(runs), len(commits)) == (1, 3)
+
+
+def test_resume_rebuilds_only_what_the_failed_run_did_not_finish(pp, project):
+    shutil.copytree(BUNDLED_SQL, project / 'sql', dirs_exist_ok=True)
+    fact_sales = project / 'sql' / 'gold' / 'fact_sales.sql'
+    good_sql = fact_sales.read_text()
+    fact_sales.write_text(good_sql.replace('FROM bronze.order_items oi', 'FROM bronze.no_such_table oi'))
+    source_config = pp.load_config('source_tables')
+    pp.extract_tables(source_config, source_config['tables'], force=True)
+    pipeline = {'name': 'test', 'retries': 0}
+
+    with pytest.raises(RuntimeError, match='gold.fact_sales'):
+        with pp.track_run('run', 'test'):
+            pp.run_pipeline(pipeline, force=True)
+
+    fact_sales.write_text(good_sql)
+    with pp.track_run('run', 'test') as run:
+        results = pp.run_pipeline(pipeline, force=True, resume='last')
+
+    statuses = {r['table']: r['status'] for r in results}
+    assert statuses.pop('gold.fact_sales') == 'built'
+    assert set(statuses.values()) == {'cached'}
+    assert run.resumed_from is not None
@@ -0,0 +1,113 @@
+"""
+The pipeline service runs queued jobs one at a time, coalesces duplicates and serves them over HTTP.
+"""
+
+import socket
+import threading
+
+import pyarrow.parquet as pq
+import pytest
+
+from parquet_pipelines.cli import run_command
+from parquet_pipelines.service import PipelineService, ServiceClient, serve
+from tests.conftest import rows
+
+
+class BlockingRunner:
+    """Runs jobs by recording them; the first one waits until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.ran = []
+
+    def __call__(self, pp, command, options):
+        if not self.ran:
+            self.started.set()
+            self.release.wait(10)
+        self.ran.append((command, options))
+        if options.get('fail'):
+            raise RuntimeError('job failed')
+        return {'command': command}
+
+
+@pytest.fixture
+def service():
+    runner = BlockingRunner()
+    service = PipelineService(pp=None, runner=runner)
+    service._worker.start()
+    yield service, runner
+    runner.release.set()
+    service.stop()
+
+
+def test_identical_queued_jobs_coalesce(service):
+    service, runner = service
+    running = service.submit('run', {'pipeline': True})
+    assert runner.started.wait(10)
+
+    queued = service.submit('run', {'pipeline': True})
+    assert queued is not running
+    assert service.submit('run', {'pipeline': True}) is queued
+    other = service.submit('run', {'pipeline': True, 'force': True})
+    assert other is not queued
+
+    runner.release.set()
+    for job in (running, queued, other):
+        assert job.done.wait(10)
+        assert job.status == 'succeeded'
+    assert runner.ran == [('run', {'pipeline': True})] * 2 + [('run', {'pipeline': True, 'force': True})]
+
+
+def test_failed_job_reports_its_error(service):
+    service, runner = service
+    runner.release.set()
+    job = service.submit('extract', {'fail': True})
+
+    assert job.done.wait(10)
+    assert (job.status, job.error) == ('failed', 'job failed')
+    with pytest.raises(ValueError):
+        service.submit('drop', {})
+
+
+@pytest.fixture
+def client(pp):
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    server = threading.Thread(target=serve, args=(pp, run_command), kwargs={'port': port}, daemon=True)
+    server.start()
+    client = ServiceClient(f"http://127.0.0.1:{port}")
+    for _ in range(100):
+        try:
+            client.health()
+            break
+        except ConnectionError:
+            threading.Event().wait(0.05)
+    yield client
+    client.shutdown()
+    server.join(10)
+
+
+def test_http_endpoints(pp, client, tmp_path):
+    assert client.health()['status'] == 'ok'
+
+    job = client.run('extract', {'table': 'orders', 'force': True})
+    assert job['status'] == 'succeeded'
+    assert job['result']['rows'] == rows(pp, "SELECT count(*) FROM bronze.orders")[0][0]
+    assert [j['id'] for j in client._request('GET', '/jobs')['jobs']] == [job['id']]
+
+    result = client.query("SELECT status, count(*) FROM bronze.orders GROUP BY status ORDER BY status")
+    assert result['columns'] == ['status', 'count_star()']
+    assert [tuple(r) for r in result['rows']] == rows(
+        pp, "SELECT status, count(*) FROM bronze.orders GROUP BY status ORDER BY status")
+
+    path = tmp_path / 'orders.parquet'
+    assert client.export("SELECT * FROM bronze.orders", str(path))['rows'] == job['result']['rows']
+    assert pq.read_metadata(path).num_rows == job['result']['rows']
+
+    assert client.status()['runs'][0]['command'] == 'extract'
+    with pytest.raises(RuntimeError, match='404'):
+        client._request('GET', '/nowhere')
+    with pytest.raises(RuntimeError, match='400'):
+        client.submit('drop', {})
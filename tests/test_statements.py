@@ -0,0 +1,151 @@
+"""
+Model files split into statements that run concurrently where they don't touch each other's tables.
+"""
+
+import threading
+import time
+
+import pytest
+
+from parquet_pipelines.statements import (
+    ResourceBudget, is_serial, parse_size, parse_statements, split_statements, statement_dependencies
+)
+from tests.conftest import rows, write_model
+
+MODEL = """-- name: order_stats
+-- layer: silver
+-- depends_on: bronze.orders, bronze.customers
+-- threads: 2
+CREATE OR REPLACE TABLE silver.order_counts AS
+SELECT customer_id, count(*) AS orders FROM bronze.orders GROUP BY customer_id;
+
+-- memory_limit: 100MB
+CREATE OR REPLACE TABLE silver.customer_names AS
+SELECT customer_id, first_name FROM bronze.customers;
+
+CREATE OR REPLACE TABLE silver.order_stats AS
+SELECT n.first_name, c.orders
+FROM silver.customer_names n JOIN silver.order_counts c USING (customer_id);
+"""
+
+
+def test_split_respects_quotes_and_comments():
+    sql = """
+        -- leading comment; kept with its statement
+        SELECT 'a;b', "x;y" FROM t;
+        /* block; comment */ SELECT $$ dollar ; quoted $$, $tag$ ; $tag$;
+        -- only a comment;
+    """
+    assert split_statements(sql) == [
+        "-- leading comment; kept with its statement\n        SELECT 'a;b', \"x;y\" FROM t;",
+        "/* block; comment */ SELECT $$ dollar ; quoted $$, $tag$ ; $tag$;",
+    ]
+
+
+def test_dependencies_and_hints():
+    statements = parse_statements(MODEL, {'threads': '4', 'materialized': 'table'})
+
+    assert [s.target for s in statements] == ['silver.order_counts', 'silver.customer_names', 'silver.order_stats']
+    # A statement's own hints win over the header's, which fill in the rest
+    assert [s.hints for s in statements] == [
+        {'threads': '2'}, {'threads': '4', 'memory_limit': '100MB'}, {'threads': '4'}
+    ]
+    dependencies = statement_dependencies(statements)
+    assert dependencies == {0: set(), 1: set(), 2: {0, 1}}
+    assert not is_serial(dependencies)
+
+
+@pytest.mark.parametrize('sql', [
+    "SET threads = 2; CREATE TABLE silver.a AS SELECT 1;",
+    "CREATE TEMP TABLE t AS SELECT 1; CREATE TABLE silver.a AS SELECT * FROM t;",
+])
+def test_statements_without_a_shared_target_run_serially(sql):
+    assert statement_dependencies(parse_statements(sql)) is None
+
+
+def test_chain_is_serial():
+    statements = parse_statements("CREATE TABLE silver.a AS SELECT 1; CREATE TABLE silver.b AS SELECT * FROM a;")
+    assert is_serial(statement_dependencies(statements))
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('512MB', 512 * 10 ** 6), ('2 GiB', 2 * 2 ** 30), ('1.5GB', 1.5 * 10 ** 9), ('100', 100),
+])
+def test_parse_size(value, expected):
+    assert parse_size(value) == expected
+
+
+def test_parse_size_rejects_unknown_units():
+    with pytest.raises(ValueError):
+        parse_size('3 parsecs')
+
+
+def test_budget_holds_back_what_does_not_fit():
+    budget = ResourceBudget(threads=4, memory_bytes=1000)
+    order = []
+
+    def hold(name, threads, seconds):
+        with budget.reserve(threads=threads):
+            order.append(f"{name} start")
+            time.sleep(seconds)
+            order.append(f"{name} end")
+
+    with budget.reserve(threads=3):
+        waiting = threading.Thread(target=hold, args=('big', 2, 0))
+        waiting.start()
+        # One thread is free: a small request gets in, the big one waits
+        hold('small', 1, 0)
+        time.sleep(0.1)
+        assert order == ['small start', 'small end']
+    waiting.join(5)
+    assert order[2:] == ['big start', 'big end']
+
+    # Requests beyond the totals are capped, so they still run
+    with budget.reserve(threads=64, memory_bytes=10 ** 12):
+        pass
+
+
+def test_exclusive_waits_for_holders_and_holds_back_new_ones():
+    budget = ResourceBudget(threads=4, memory_bytes=1000)
+    order = []
+    held = threading.Event()
+
+    def holder():
+        with budget.reserve():
+            held.set()
+            time.sleep(0.2)
+            order.append('holder')
+
+    def exclusive():
+        with budget.exclusive():
+            order.append('exclusive')
+
+    def newcomer():
+        with budget.reserve():
+            order.append('newcomer')
+
+    threads = [threading.Thread(target=holder)]
+    threads[0].start()
+    held.wait(5)
+    threads.append(threading.Thread(target=exclusive))
+    threads[1].start()
+    time.sleep(0.05)
+    threads.append(threading.Thread(target=newcomer))
+    threads[2].start()
+    for thread in threads:
+        thread.join(5)
+    assert order == ['holder', 'exclusive', 'newcomer']
+
+
+def test_multi_statement_model_builds_every_table(pp, project, retail_db):
+    source = {'connection': {'type': 'sqlite', 'database': str(retail_db)}}
+    pp.extract_tables(source, [{'name': t, 'schema': 'main'} for t in ('orders', 'customers')], force=True)
+    model = write_model(project, 'silver', 'order_stats', MODEL)
+
+    with pp.track_run('run', 'test') as run:
+        assert pp.execute_sql_transformation(model, 'silver', force=True) == 'built'
+
+    assert rows(pp, "SELECT sum(orders) FROM silver.order_stats") == rows(pp, "SELECT count(*) FROM bronze.orders")
+    statements = sorted(s.name for s in run.steps if s.kind == 'statement')
+    assert statements == [f"silver.order_stats: silver.{t}" for t in ('customer_names', 'order_counts', 'order_stats')]
+    assert all(s.status == 'built' for s in run.steps)
@@ -0,0 +1,59 @@
+"""
+Run telemetry measures each step, keeps nested steps apart and reports run history.
+"""
+
+import pytest
+
+from parquet_pipelines.telemetry import RunRecorder
+from tests.conftest import write_model
+
+SUMMARY = """-- name: order_summary
+-- layer: silver
+-- depends_on: bronze.orders
+CREATE OR REPLACE TABLE silver.order_summary AS
+SELECT status, count(*) AS orders FROM bronze.orders GROUP BY status;
+"""
+
+
+@pytest.fixture
+def recorder():
+    run = RunRecorder('run', 'test')
+    yield run
+    run.finish()
+
+
+def test_nested_step_hands_the_thread_back(recorder):
+    with recorder.step('model', 'silver.outer') as outer:
+        with recorder.step('statement', 'silver.inner') as inner:
+            assert recorder.current_step() is inner
+        assert recorder.current_step() is outer
+    assert recorder.current_step() is None
+
+
+def test_failed_step_fails_the_run(recorder):
+    with pytest.raises(ValueError):
+        with recorder.step('extract', 'bronze.orders'):
+            raise ValueError('boom')
+    recorder.finish()
+
+    assert recorder.steps[0].status == 'failed'
+    assert recorder.steps[0].error == 'boom'
+    assert recorder.status == 'failed'
+
+
+def test_run_history_reports_steps_and_trends(pp, project, retail_db):
+    source = {'connection': {'type': 'sqlite', 'database': str(retail_db)}}
+    write_model(project, 'silver', 'order_summary', SUMMARY)
+    for _ in range(2):
+        with pp.track_run('run', 'test'):
+            pp.extract_table(source, {'name': 'orders', 'schema': 'main'}, force=True)
+            pp.run_pipeline({'name': 'test'}, force=True)
+
+    history = pp.get_run_history()
+    assert [r['status'] for r in history['runs']] == ['succeeded', 'succeeded']
+    assert history['latest_run_id'] == history['runs'][0]['run_id']
+    steps = {(s['kind'], s['name']): s for s in history['slowest_steps']}
+    assert steps['extract', 'bronze.orders']['rows_out'] == steps['model', 'silver.order_summary']['rows_in']
+    assert steps['model', 'silver.order_summary']['status'] == 'built'
+    assert {(t['kind'], t['name']) for t in history['trends']} == set(steps)
+    assert all(t['runs'] == 1 for t in history['trends'])
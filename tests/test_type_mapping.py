@@ -0,0 +1,78 @@
+"""
+Integer downcasting picks the narrowest type at its boundaries and widens when increments outgrow it.
+"""
+
+import sqlite3
+
+import pytest
+
+from parquet_pipelines.type_mapping import smallest_integer
+from tests.conftest import rows
+
+
+@pytest.mark.parametrize('low, high, expected', [
+    (-128, 127, 'TINYINT'),
+    (-129, 0, 'SMALLINT'),
+    (0, 128, 'SMALLINT'),
+    (-2 ** 15, 2 ** 15 - 1, 'SMALLINT'),
+    (0, 2 ** 15, 'INTEGER'),
+    (-2 ** 31, 2 ** 31 - 1, 'INTEGER'),
+    (-2 ** 31 - 1, 0, 'BIGINT'),
+    (-2 ** 63, 2 ** 63 - 1, 'BIGINT'),
+    (0, 2 ** 63, None),
+    (None, None, None),
+])
+def test_smallest_integer(low, high, expected):
+    assert smallest_integer(low, high) == expected
+
+
+@pytest.fixture
+def numbers_db(tmp_path):
+    path = tmp_path / 'numbers.db'
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE numbers (
+            id INTEGER PRIMARY KEY, tiny INTEGER, small INTEGER, medium INTEGER, big INTEGER,
+            empty INTEGER, updated DATETIME
+        )
+    """)
+    conn.executemany("INSERT INTO numbers VALUES (?, ?, ?, ?, ?, NULL, ?)", [
+        (1, -128, -129, -2 ** 15 - 1, -2 ** 31 - 1, '2024-01-01 00:00:00'),
+        (2, 127, 2 ** 15 - 1, 2 ** 31 - 1, 2 ** 31, '2024-01-02 00:00:00'),
+    ])
+    conn.commit()
+    conn.close()
+    return path
+
+
+def column_types(pp):
+    return dict(rows(pp, """
+        SELECT column_name, data_type FROM duckdb_columns()
+        WHERE schema_name = 'bronze' AND table_name = 'numbers'
+    """))
+
+
+@pytest.mark.parametrize('backend', ['arrow', 'pandas', 'duckdb'])
+def test_downcast_at_the_boundaries_and_widen_on_increments(pp, numbers_db, backend):
+    source = {'connection': {'type': 'sqlite', 'database': str(numbers_db)}, 'backend': backend,
+              'downcast_integers': True}
+    table = {'name': 'numbers', 'schema': 'main', 'incremental': {'watermark_column': 'updated'}}
+
+    pp.extract_table(source, table, force=True)
+    types = column_types(pp)
+    assert {c: types[c] for c in ('id', 'tiny', 'small', 'medium', 'big')} == {
+        'id': 'TINYINT', 'tiny': 'TINYINT', 'small': 'SMALLINT', 'medium': 'INTEGER', 'big': 'BIGINT'
+    }
+    # All NULL: nothing to go by, so the declared type stays
+    assert types['empty'] == 'BIGINT'
+
+    conn = sqlite3.connect(numbers_db)
+    conn.execute("INSERT INTO numbers VALUES (3, 128, 32768, 1, 1, 1, '2024-01-03 00:00:00')")
+    conn.commit()
+    conn.close()
+    assert pp.extract_table(source, table, force=True)['mode'] == 'incremental'
+
+    types = column_types(pp)
+    assert (types['tiny'], types['small'], types['medium']) == ('SMALLINT', 'INTEGER', 'INTEGER')
+    assert rows(pp, "SELECT tiny, small FROM bronze.numbers WHERE id = 3") == [(128, 2 ** 15)]
+    assert rows(pp, "SELECT count(*), sum(big) FROM bronze.numbers") == [(3, 0)]